@@ -0,0 +1,123 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from grpc_services.registry import AgentRegistry
+
+# Per agent replica: calls the gateway lets run at once, and how many more may wait for a slot
+ADMISSION_LIMITS = {
+    "transcription": int(os.environ.get("ADMISSION_LIMIT_TRANSCRIPTION", "2")),
+    "vision": int(os.environ.get("ADMISSION_LIMIT_VISION", "2")),
+    "generation": int(os.environ.get("ADMISSION_LIMIT_GENERATION", "2")),
+    "mcp": int(os.environ.get("ADMISSION_LIMIT_MCP", "8")),
+}
+ADMISSION_QUEUES = {
+    "transcription": int(os.environ.get("ADMISSION_QUEUE_TRANSCRIPTION", "8")),
+    "vision": int(os.environ.get("ADMISSION_QUEUE_VISION", "8")),
+    "generation": int(os.environ.get("ADMISSION_QUEUE_GENERATION", "8")),
+    "mcp": int(os.environ.get("ADMISSION_QUEUE_MCP", "64")),
+}
+# Smoothing of the measured service time, and the Retry-After used before anything was measured
+ADMISSION_EWMA_ALPHA = float(os.environ.get("ADMISSION_EWMA_ALPHA", "0.2"))
+ADMISSION_DEFAULT_RETRY_S = float(os.environ.get("ADMISSION_DEFAULT_RETRY_S", "5"))
+
+
+class Overloaded(Exception):
+    """Raised when an agent's limit and wait queue are both full; maps to HTTP 429."""
+
+    def __init__(self, agent: str, retry_after: float):
+        super().__init__(f"{agent} agent is busy, retry in {retry_after:.0f}s")
+        self.agent = agent
+        self.retry_after = retry_after
+
+
+class AgentLimiter:
+    """Concurrency limit plus a bounded wait queue in front of one agent.
+
+    ``reserve()`` is the synchronous admission check: it fails fast with
+    ``Overloaded`` when ``limit`` calls are running and ``queue_size`` more
+    are already waiting. An admitted caller then runs its call inside
+    ``slot()``, which waits for a free slot and feeds the call's duration
+    into an exponentially weighted service time used for Retry-After.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.service_time: Optional[float] = None
+        self._sem = asyncio.Semaphore(self.limit)
+
+    def retry_after(self) -> float:
+        # Expected wait until a newcomer would start: everyone queued ahead of it, ``limit`` at a time
+        if self.service_time is None:
+            return ADMISSION_DEFAULT_RETRY_S
+        return max(1.0, math.ceil(self.service_time * (self.waiting + 1) / self.limit))
+
+    def reserve(self):
+        if self.active + self.waiting >= self.limit + self.queue_size:
+            self.rejected += 1
+            raise Overloaded(self.name, self.retry_after())
+        self.admitted += 1
+        self.waiting += 1
+
+    def unreserve(self):
+        # Give back a reservation that will never run (e.g. a second agent refused the request)
+        self.admitted -= 1
+        self.waiting -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Run one reserved call; ``reserve()`` must have succeeded first."""
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._sem.release()
+        self._observe(time.perf_counter() - start)
+
+    async def run(self, call):
+        # reserve() + slot() for callers that have nothing to do in between
+        self.reserve()
+        async with self.slot():
+            return await call()
+
+    def _observe(self, seconds: float):
+        if self.service_time is None:
+            self.service_time = seconds
+        else:
+            self.service_time += ADMISSION_EWMA_ALPHA * (seconds - self.service_time)
+
+    def status(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "service_time_s": round(self.service_time, 3) if self.service_time is not None else None,
+            "retry_after_s": self.retry_after(),
+        }
+
+
+def build_limiters(registry: AgentRegistry) -> Dict[str, AgentLimiter]:
+    # Capacity grows with the number of replicas registered for each agent
+    limiters = {}
+    for name in registry.replicas:
+        n = registry.count(name)
+        limiters[name] = AgentLimiter(name, ADMISSION_LIMITS[name] * n, ADMISSION_QUEUES[name] * n)
+    return limiters
@@ -1,195 +1,306 @@
 from concurrent import futures
 import grpc
+import hashlib
+import os
 import textwrap
 from pathlib import Path
-from pptx import Presentation
-from pptx.util import Pt, Inches
-from pptx.enum.text import PP_ALIGN
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from transformers import pipeline
 from grpc_services import video_analysis_pb2, video_analysis_pb2_grpc
+from grpc_services.channels import GRPC_MAX_CONCURRENT_RPCS, ChannelManager, server_options
+from grpc_services.registry import agent_port
+from grpc_services.readiness import Readiness
+from model.detection_store import format_span, load_store
+from model.summarizer import ChunkedSummarizer
+import result_cache
 
 ARTIFACTS_DIR = Path(__file__).resolve().parents[1] / "artifacts"
 UPLOADS_DIR = Path(__file__).resolve().parents[1] / "uploads"
 ARTIFACTS_DIR.mkdir(exist_ok=True)
+REPORT_MIN_SCORE = 0.5  # confidence applied to the vision agent's detection store
+# Deadline for the transcription/vision calls made when a report's inputs are missing
+GEN_PREREQ_TIMEOUT_S = float(os.environ.get("GEN_PREREQ_TIMEOUT_S", "1800"))
 
-# Initialize summarization model
-try:
-    summarizer = pipeline("summarization", model="models/t5-small", tokenizer="models/t5-small")
-    _HAS_SUMMARY = True
-except Exception:
-    summarizer = None
-    _HAS_SUMMARY = False
+# Long transcripts are summarized map-reduce style: token-bounded chunks, batched model calls
+SUMMARY_CHUNK_TOKENS = int(os.environ.get("SUMMARY_CHUNK_TOKENS", "400"))  # t5-small reads 512
+SUMMARY_BATCH_SIZE = int(os.environ.get("SUMMARY_BATCH_SIZE", "4"))
 
+# Summarizer and report libraries are loaded by load_models() once the port is bound
+summarizer = None
+chunked_summarizer = None
+_HAS_SUMMARY = False
 
-def _stub(port: int):
-    ch = grpc.insecure_channel(f"localhost:{port}")
-    return ch, video_analysis_pb2_grpc.VideoAnalysisStub(ch)
 
+def load_models():
+    global summarizer, chunked_summarizer, _HAS_SUMMARY
+    # The renderers import these on use; importing them here keeps the first report fast
+    import pptx  # noqa: F401
+    import reportlab.pdfgen.canvas  # noqa: F401
 
-class GenerationServicer(video_analysis_pb2_grpc.VideoAnalysisServicer):
-    def GenerateReport(self, request, context):
-        file_path = request.file_path
-        report_type = (request.report_type or "pdf").lower()
-        base = Path(file_path).stem
+    # Initialize summarization model
+    try:
+        from transformers import pipeline
+        summarizer = pipeline("summarization", model="models/t5-small", tokenizer="models/t5-small")
+        chunked_summarizer = ChunkedSummarizer(summarizer, "models/t5-small", SUMMARY_CHUNK_TOKENS, SUMMARY_BATCH_SIZE)
+        _HAS_SUMMARY = True
+    except Exception:
+        summarizer = None
+        chunked_summarizer = None
+        _HAS_SUMMARY = False
+    print("Generation Agent: " + ("Summarization enabled" if _HAS_SUMMARY else "no summarizer"))
 
-        transcript_path = UPLOADS_DIR / f"{base}.txt"
-        vision_path = UPLOADS_DIR / f"{base}.vision.txt"
-
-        # Auto-call agents if required files are missing
-        if not transcript_path.exists():
-            print("Transcript not found — auto-calling Transcription Agent...")
-            ch, stub = _stub(50051)
-            stub.TranscribeVideo(video_analysis_pb2.VideoRequest(file_path=file_path))
-            ch.close()
-
-        if not vision_path.exists():
-            print("Vision results not found — auto-calling Vision Agent...")
-            ch, stub = _stub(50052)
-            stub.AnalyzeVideo(video_analysis_pb2.VideoRequest(file_path=file_path))
-            ch.close()
-
-        transcript_text = transcript_path.read_text(encoding="utf-8") if transcript_path.exists() else ""
-        vision_summary = vision_path.read_text(encoding="utf-8") if vision_path.exists() else ""
-
-        # Summarize transcript if possible
-        if _HAS_SUMMARY and transcript_text:
-            short_summary = summarizer(
-                transcript_text[:1000],
-                max_length=150,
-                min_length=40,
-                do_sample=False
-            )[0]["summary_text"]
-        else:
-            short_summary = transcript_text[:800] or "No transcript available."
-
-        # Format vision summary with bullet points
-        if "Objects detected:" in vision_summary:
-            parts = vision_summary.split("Objects detected:")
-            objects_list = parts[1].strip().splitlines() if len(parts) > 1 else []
-            bullet_list = "\n".join([f"• {obj.strip()}" for obj in objects_list if obj.strip()])
-            formatted_vision = f"Objects detected:\n{bullet_list}"
+
+readiness = Readiness("Generation Agent", load_models)
+
+
+# One long-lived channel per agent replica (see agent_registry.json), shared by all report requests
+_channels = ChannelManager()
+
+
+REPORT_FORMATS = ("pdf", "pptx")
+
+
+def normalize_report_types(values):
+    # "ppt" -> pptx, "both" -> every format; anything else falls back to PDF
+    exts = []
+    for value in values:
+        value = (value or "pdf").lower()
+        if value == "both":
+            wanted = REPORT_FORMATS
+        elif value in ("pptx", "ppt"):
+            wanted = ("pptx",)
         else:
-            formatted_vision = vision_summary.strip() or "No visual data available."
-
-        # Section labels
-        title_text = "Local AI Video Analyzer — Summary Report"
-        transcript_header = "Transcript Summary"
-        vision_header = "Vision Summary"
-
-        # Generate PowerPoint Report
-        if report_type in ("pptx", "ppt"):
-            out_path = ARTIFACTS_DIR / f"{base}_summary.pptx"
-            prs = Presentation()
-            slide_layout = prs.slide_layouts[6]  # blank slide
-            slide = prs.slides.add_slide(slide_layout)
-
-            # Add centered title
-            title_box = slide.shapes.add_textbox(Inches(1), Inches(0.5), Inches(8), Inches(1))
-            title_tf = title_box.text_frame
-            title_p = title_tf.add_paragraph()
-            title_p.text = title_text
-            title_p.font.size = Pt(26)
-            title_p.font.bold = True
-            title_p.font.name = "Arial"
-            title_p.alignment = PP_ALIGN.CENTER
-
-            # Add content box (Transcript + Vision)
-            content_box = slide.shapes.add_textbox(Inches(1), Inches(1.8), Inches(8.5), Inches(5))
-            content_tf = content_box.text_frame
-
-            # Transcript section
-            p1 = content_tf.add_paragraph()
-            p1.text = transcript_header
-            p1.font.bold = True
-            p1.font.size = Pt(16)
-            p1.font.name = "Arial"
-            p1.space_after = Pt(6)
-
-            p2 = content_tf.add_paragraph()
-            p2.text = short_summary.strip()
-            p2.font.size = Pt(14)
-            p2.font.name = "Arial"
-            p2.space_after = Pt(10)
-
-            # Vision section
-            p3 = content_tf.add_paragraph()
-            p3.text = vision_header
-            p3.font.bold = True
-            p3.font.size = Pt(16)
-            p3.font.name = "Arial"
-            p3.space_after = Pt(6)
-
-            # Vision bullet list
-            for line in formatted_vision.splitlines():
-                if line.startswith("Objects detected"):
-                    continue  # skip repeating header line
-                if line.startswith("•"):
-                    p = content_tf.add_paragraph()
-                    p.text = line
-                    p.font.size = Pt(14)
-                    p.font.name = "Arial"
-                    p.space_after = Pt(4)
-
-            prs.save(str(out_path))
-            print(f"PowerPoint summary saved: {out_path}")
-            return video_analysis_pb2.ReportResponse(report_path=str(out_path))
-
-        # Generate PDF Report 
-        out_path = ARTIFACTS_DIR / f"{base}_summary.pdf"
-        c = canvas.Canvas(str(out_path), pagesize=letter)
-        width, height = letter
-
-        # Title centered
-        c.setFont("Helvetica-Bold", 20)
-        title_width = c.stringWidth(title_text, "Helvetica-Bold", 20)
-        c.drawString((width - title_width) / 2, 760, title_text)
-
-        # Separator line
-        c.setLineWidth(1)
-        c.line(40, 755, width - 40, 755)
-
-        y = 730
-
-        # Transcript Section
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(40, y, transcript_header)
-        y -= 20
-        c.setFont("Helvetica", 12)
-        for line in textwrap.wrap(short_summary, width=90):
-            c.drawString(40, y, line)
+            wanted = ("pdf",)
+        exts.extend(ext for ext in wanted if ext not in exts)
+    return exts or ["pdf"]
+
+
+class ReportModel:
+    """What a report shows, built once per request and shared by every output format."""
+
+    title = "Local AI Video Analyzer — Summary Report"
+    transcript_header = "Transcript Summary"
+    vision_header = "Vision Summary"
+
+    def __init__(self, summary: str, formatted_vision: str):
+        self.summary = summary
+        self.formatted_vision = formatted_vision
+
+    def digest(self) -> str:
+        return hashlib.sha256(f"{self.summary}\n{self.formatted_vision}".encode("utf-8")).hexdigest()
+
+
+def build_report_model(file_path: str) -> ReportModel:
+    base = Path(file_path).stem
+
+    transcript_path = UPLOADS_DIR / f"{base}.txt"
+    vision_path = UPLOADS_DIR / f"{base}.vision.txt"
+    detections_path = UPLOADS_DIR / f"{base}.detections.npz"
+
+    # Auto-call agents if required files are missing; both run at the same time.
+    # The agents fold these into any identical job already in flight (e.g. a running /transcribe).
+    video_req = video_analysis_pb2.VideoRequest(file_path=file_path)
+    calls = []
+    if not transcript_path.exists():
+        print("Transcript not found — auto-calling Transcription Agent...")
+        replica = _channels.acquire("transcription")
+        calls.append(("Transcription", replica, _channels.stub_for(replica).TranscribeVideo.future(video_req, timeout=GEN_PREREQ_TIMEOUT_S)))
+
+    if not vision_path.exists() and not detections_path.exists():
+        print("Vision results not found — auto-calling Vision Agent...")
+        replica = _channels.acquire("vision")
+        calls.append(("Vision", replica, _channels.stub_for(replica).AnalyzeVideo.future(video_req, timeout=GEN_PREREQ_TIMEOUT_S)))
+
+    for name, replica, call in calls:
+        error = None
+        try:
+            call.result()
+        except grpc.RpcError as e:
+            # Report on whatever is available rather than failing the whole request
+            error = e
+            print(f"{name} Agent failed ({e.code().name}): {e.details()}")
+        finally:
+            _channels.release(replica, error)
+
+    transcript_text = transcript_path.read_text(encoding="utf-8") if transcript_path.exists() else ""
+    vision_summary = vision_path.read_text(encoding="utf-8") if vision_path.exists() else ""
+
+    # Summarize the whole transcript if possible (chunk summaries memoized by content)
+    if _HAS_SUMMARY and transcript_text:
+        short_summary = chunked_summarizer.summarize(transcript_text)
+    else:
+        short_summary = transcript_text[:800] or "No transcript available."
+
+    # Format vision summary with bullet points (prefer the per-frame detection store)
+    store = load_store(detections_path)
+    if store is not None:
+        counts = store.label_counts(REPORT_MIN_SCORE)
+        bullets = []
+        for label in sorted(counts, key=counts.get, reverse=True):
+            spans = [format_span(a, b) for a, b in store.timeline(label, REPORT_MIN_SCORE)]
+            shown = ", ".join(spans[:3]) + (", ..." if len(spans) > 3 else "")
+            bullets.append(f"• {label} ({counts[label]}x, at {shown})")
+        formatted_vision = "Objects detected:\n" + "\n".join(bullets) if bullets else "No objects detected."
+    elif "Objects detected:" in vision_summary:
+        parts = vision_summary.split("Objects detected:")
+        objects_list = parts[1].strip().splitlines() if len(parts) > 1 else []
+        bullet_list = "\n".join([f"• {obj.strip()}" for obj in objects_list if obj.strip()])
+        formatted_vision = f"Objects detected:\n{bullet_list}"
+    else:
+        formatted_vision = vision_summary.strip() or "No visual data available."
+
+    return ReportModel(short_summary, formatted_vision)
+
+
+def render_pptx(report: ReportModel, out_path: Path):
+    from pptx import Presentation
+    from pptx.util import Pt, Inches
+    from pptx.enum.text import PP_ALIGN
+
+    prs = Presentation()
+    slide_layout = prs.slide_layouts[6]  # blank slide
+    slide = prs.slides.add_slide(slide_layout)
+
+    # Add centered title
+    title_box = slide.shapes.add_textbox(Inches(1), Inches(0.5), Inches(8), Inches(1))
+    title_tf = title_box.text_frame
+    title_p = title_tf.add_paragraph()
+    title_p.text = report.title
+    title_p.font.size = Pt(26)
+    title_p.font.bold = True
+    title_p.font.name = "Arial"
+    title_p.alignment = PP_ALIGN.CENTER
+
+    # Add content box (Transcript + Vision)
+    content_box = slide.shapes.add_textbox(Inches(1), Inches(1.8), Inches(8.5), Inches(5))
+    content_tf = content_box.text_frame
+
+    # Transcript section
+    p1 = content_tf.add_paragraph()
+    p1.text = report.transcript_header
+    p1.font.bold = True
+    p1.font.size = Pt(16)
+    p1.font.name = "Arial"
+    p1.space_after = Pt(6)
+
+    p2 = content_tf.add_paragraph()
+    p2.text = report.summary.strip()
+    p2.font.size = Pt(14)
+    p2.font.name = "Arial"
+    p2.space_after = Pt(10)
+
+    # Vision section
+    p3 = content_tf.add_paragraph()
+    p3.text = report.vision_header
+    p3.font.bold = True
+    p3.font.size = Pt(16)
+    p3.font.name = "Arial"
+    p3.space_after = Pt(6)
+
+    # Vision bullet list
+    for line in report.formatted_vision.splitlines():
+        if line.startswith("Objects detected"):
+            continue  # skip repeating header line
+        if line.startswith("•"):
+            p = content_tf.add_paragraph()
+            p.text = line
+            p.font.size = Pt(14)
+            p.font.name = "Arial"
+            p.space_after = Pt(4)
+
+    prs.save(str(out_path))
+    print(f"PowerPoint summary saved: {out_path}")
+
+
+def render_pdf(report: ReportModel, out_path: Path):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(str(out_path), pagesize=letter)
+    width, height = letter
+
+    # Title centered
+    c.setFont("Helvetica-Bold", 20)
+    title_width = c.stringWidth(report.title, "Helvetica-Bold", 20)
+    c.drawString((width - title_width) / 2, 760, report.title)
+
+    # Separator line
+    c.setLineWidth(1)
+    c.line(40, 755, width - 40, 755)
+
+    y = 730
+
+    # Transcript Section
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(40, y, report.transcript_header)
+    y -= 20
+    c.setFont("Helvetica", 12)
+    for line in textwrap.wrap(report.summary, width=90):
+        c.drawString(40, y, line)
+        y -= 15
+
+    # Vision Section
+    y -= 25
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(40, y, report.vision_header)
+    y -= 20
+    c.setFont("Helvetica", 12)
+
+    for line in report.formatted_vision.splitlines():
+        if line.startswith("Objects detected"):
+            c.drawString(40, y, "Objects detected:")
+            y -= 15
+        elif line.startswith("•"):
+            c.drawString(60, y, line)
             y -= 15
 
-        # Vision Section
-        y -= 25
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(40, y, vision_header)
-        y -= 20
-        c.setFont("Helvetica", 12)
+    c.showPage()
+    c.save()
+    print(f"PDF summary saved: {out_path}")
+
+
+RENDERERS = {"pdf": render_pdf, "pptx": render_pptx}
+_render_pool = futures.ThreadPoolExecutor(max_workers=len(RENDERERS))
 
-        for line in formatted_vision.splitlines():
-            if line.startswith("Objects detected"):
-                c.drawString(40, y, "Objects detected:")
-                y -= 15
-            elif line.startswith("•"):
-                c.drawString(60, y, line)
-                y -= 15
 
-        c.showPage()
-        c.save()
-        print(f"PDF summary saved: {out_path}")
-        return video_analysis_pb2.ReportResponse(report_path=str(out_path))
+class GenerationServicer(video_analysis_pb2_grpc.VideoAnalysisServicer):
+    def GenerateReport(self, request, context):
+        readiness.require(context)
+        file_path = request.file_path
+        base = Path(file_path).stem
+        exts = normalize_report_types(list(request.report_types) or [request.report_type])
+
+        # Read, summarize and format once, whatever the number of formats
+        report = build_report_model(file_path)
+
+        # Rendered reports are reused when the video and the report inputs match
+        source = result_cache.file_digest(file_path) if Path(file_path).exists() else base
+        paths, pending = [], []
+        for ext in exts:
+            out_path = ARTIFACTS_DIR / f"{base}_summary.{ext}"
+            paths.append(str(out_path))
+            report_key = result_cache.cache_key("report", source, report_type=ext, inputs=report.digest())
+            if result_cache.restore(report_key, f".{ext}", out_path):
+                print(f"Report cache hit: {out_path}")
+                continue
+            pending.append((ext, report_key, out_path, _render_pool.submit(RENDERERS[ext], report, out_path)))
+
+        # Missing formats render side by side from the same report model
+        for ext, report_key, out_path, job in pending:
+            job.result()
+            result_cache.store(report_key, f".{ext}", out_path)
+        return video_analysis_pb2.ReportResponse(report_path=paths[0], report_paths=paths)
 
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2), options=server_options(),
+                         maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS["generation"])
     video_analysis_pb2_grpc.add_VideoAnalysisServicer_to_server(GenerationServicer(), server)
-    server.add_insecure_port("[::]:50053")
-    msg = "Generation Agent running on port 50053"
-    msg += " (Summarization enabled)" if _HAS_SUMMARY else " (no summarizer)"
-    print(msg)
+    readiness.attach(server)
+    port = agent_port("generation")
+    server.add_insecure_port(f"[::]:{port}")
+    print(f"Generation Agent running on port {port}")
     server.start()
+    # Port is bound; load the summarizer and report libraries while health reports NOT_SERVING
+    readiness.start()
     server.wait_for_termination()
 
 
@@ -1,56 +1,349 @@
 from concurrent import futures
+from concurrent.futures import CancelledError
+from contextlib import contextmanager
 import grpc
+import itertools
+import json
+import multiprocessing
 import os
+import queue
+import threading
 from pathlib import Path
+import numpy as np
 from grpc_services import video_analysis_pb2, video_analysis_pb2_grpc
-from model.openvino_model import extract_audio_to_wav
+from grpc_services.channels import GRPC_MAX_CONCURRENT_RPCS, server_options
+from grpc_services.registry import agent_port
+from grpc_services.readiness import Readiness
+from model.openvino_model import extract_audio_to_array, extract_audio_to_wav, iter_audio_pcm
+import result_cache
+from singleflight import SingleFlight
 
-# Import faster-whisper for ASR
-try:
-    from faster_whisper import WhisperModel  # type: ignore
-    _HAS_ASR = True
-except Exception:
-    _HAS_ASR = False
-    WhisperModel = None
+# faster-whisper is imported by import_asr(): in the background once the port is bound,
+# or when a parallel ASR worker starts
+WhisperModel = None
+VadOptions = get_speech_timestamps = None
+_HAS_ASR = False
+
+
+def import_asr() -> bool:
+    global WhisperModel, VadOptions, get_speech_timestamps, _HAS_ASR
+    if WhisperModel is None:
+        try:
+            from faster_whisper import WhisperModel  # type: ignore
+            from faster_whisper.vad import VadOptions, get_speech_timestamps  # type: ignore
+            _HAS_ASR = True
+        except Exception:
+            _HAS_ASR = False
+    return _HAS_ASR
 
 
 UPLOADS_DIR = Path(__file__).resolve().parents[1] / "uploads"
 ASR_MODEL_SIZE = "tiny"  # smallest model
 
+# One warm model per gRPC worker; split the cores between them so concurrent jobs don't oversubscribe
+ASR_MAX_WORKERS = int(os.environ.get("ASR_MAX_WORKERS", "2"))
+ASR_CPU_THREADS = int(os.environ.get("ASR_CPU_THREADS", str(max(1, (os.cpu_count() or 1) // ASR_MAX_WORKERS))))
+ASR_NUM_WORKERS = int(os.environ.get("ASR_NUM_WORKERS", "1"))
+
+# Audio path into the ASR engine:
+#   pipe   - ffmpeg PCM on stdout into one in-memory buffer (no temp file)
+#   stream - same pipe, transcribed chunk by chunk while ffmpeg keeps extracting
+#   wav    - write a WAV next to the upload first (kept only if ASR_KEEP_WAV=1)
+ASR_AUDIO_MODE = os.environ.get("ASR_AUDIO_MODE", "pipe")
+ASR_STREAM_CHUNK_S = float(os.environ.get("ASR_STREAM_CHUNK_S", "30"))
+ASR_KEEP_WAV = os.environ.get("ASR_KEEP_WAV", "0") == "1"
+ASR_SAMPLE_RATE = 16000
+
+# Long recordings: split at silences (VAD) and transcribe chunks in parallel worker processes
+ASR_PARALLEL_MIN_SECONDS = float(os.environ.get("ASR_PARALLEL_MIN_SECONDS", "600"))
+ASR_PARALLEL_CHUNK_S = float(os.environ.get("ASR_PARALLEL_CHUNK_S", "120"))
+ASR_PARALLEL_THREADS = int(os.environ.get("ASR_PARALLEL_THREADS", "2"))  # ctranslate2 threads per worker
+ASR_PARALLEL_PROCS = int(os.environ.get("ASR_PARALLEL_PROCS", str(max(1, (os.cpu_count() or 1) // ASR_PARALLEL_THREADS))))
+
+
+class WhisperPool:
+    """Loaded WhisperModel instances that requests check out and return."""
+
+    def __init__(self, size: int = ASR_MAX_WORKERS, model_size: str = ASR_MODEL_SIZE,
+                 cpu_threads: int = ASR_CPU_THREADS, num_workers: int = ASR_NUM_WORKERS):
+        self.size = max(1, size)
+        self._models = queue.Queue()
+        for _ in range(self.size):
+            self._models.put(WhisperModel(model_size, device="cpu", cpu_threads=cpu_threads, num_workers=num_workers))
+
+    @contextmanager
+    def checkout(self, timeout: float = None):
+        model = self._models.get(timeout=timeout)
+        try:
+            yield model
+        finally:
+            self._models.put(model)
+
+
+_asr_pool = None
+_asr_pool_lock = threading.Lock()
+
+
+def get_asr_pool() -> WhisperPool:
+    global _asr_pool
+    with _asr_pool_lock:
+        if _asr_pool is None:
+            _asr_pool = WhisperPool()
+        return _asr_pool
+
+
+def load_asr():
+    # Warm the pool so no caller pays the model load time
+    if import_asr():
+        get_asr_pool()
+
+
+readiness = Readiness("Transcription Agent", load_asr)
+
+
+def plan_chunks(speech, total: int, max_len: int):
+    """Tile [0, total) samples into chunks no longer than ``max_len`` where possible.
+
+    Cuts go in the middle of the silence between VAD speech segments, so
+    no word is split; a single over-long utterance becomes its own chunk.
+    """
+    if not speech:
+        return []
+    cuts = [(a["end"] + b["start"]) // 2 for a, b in zip(speech, speech[1:])]
+    chunks, start, prev = [], 0, None
+    for cut in cuts:
+        if cut - start > max_len:
+            end = prev if prev is not None and prev > start else cut
+            chunks.append((start, end))
+            start = end
+        prev = cut
+    if total - start > max_len and prev is not None and prev > start:
+        chunks.append((start, prev))  # the tail past the last cut is too long as well
+        start = prev
+    chunks.append((start, total))
+    return chunks
+
+
+_worker_model = None
+_parallel_pool = None
+_parallel_pool_lock = threading.Lock()
+
+
+def _init_asr_worker():
+    global _worker_model
+    import_asr()
+    _worker_model = WhisperModel(ASR_MODEL_SIZE, device="cpu", cpu_threads=ASR_PARALLEL_THREADS)
+
+
+def _transcribe_chunk(audio):
+    segments, _ = _worker_model.transcribe(audio, language="en")
+    return [(seg.start, seg.end, seg.text) for seg in segments]
+
+
+def get_parallel_pool():
+    # Spawned workers, each with its own model loaded once
+    global _parallel_pool
+    with _parallel_pool_lock:
+        if _parallel_pool is None:
+            _parallel_pool = futures.ProcessPoolExecutor(
+                max_workers=ASR_PARALLEL_PROCS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_asr_worker,
+            )
+        return _parallel_pool
+
+
+def transcribe_parallel(audio):
+    """Yield (start, end, text) in order, with chunk offsets added back."""
+    speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500))
+    chunks = plan_chunks(speech, len(audio), int(ASR_PARALLEL_CHUNK_S * ASR_SAMPLE_RATE))
+    print(f"Parallel ASR: {len(audio) / ASR_SAMPLE_RATE:.0f}s audio in {len(chunks)} chunks")
+    results = get_parallel_pool().map(_transcribe_chunk, (audio[a:b] for a, b in chunks))
+    for (start, _), segments in zip(chunks, results):
+        offset = start / ASR_SAMPLE_RATE
+        for seg_start, seg_end, text in segments:
+            yield offset + seg_start, offset + seg_end, text
+
+
+def transcribe_chunks(chunks):
+    """Yield (start, end, text) for consecutive float32 PCM chunks, offsets added back."""
+    with get_asr_pool().checkout() as model:
+        offset = 0.0
+        for chunk in chunks:
+            segments, _ = model.transcribe(chunk, language="en")
+            for seg in segments:
+                yield offset + seg.start, offset + seg.end, seg.text
+            offset += len(chunk) / ASR_SAMPLE_RATE
+
+
+def iter_segments(video_path: str, mode: str = ASR_AUDIO_MODE):
+    """Yield (start, end, text) for each decoded speech segment of a video."""
+    if mode == "wav":
+        wav_path = extract_audio_to_wav(video_path)
+        try:
+            with get_asr_pool().checkout() as model:
+                segments, _ = model.transcribe(wav_path, language="en")  # Force English
+                for seg in segments:
+                    yield seg.start, seg.end, seg.text
+        finally:
+            if not ASR_KEEP_WAV and os.path.exists(wav_path):
+                os.remove(wav_path)
+    elif mode == "stream":
+        # Each chunk is transcribed as soon as ffmpeg has produced it
+        yield from transcribe_chunks(iter_audio_pcm(video_path, ASR_SAMPLE_RATE, ASR_STREAM_CHUNK_S))
+    else:
+        audio = extract_audio_to_array(video_path, ASR_SAMPLE_RATE)
+        if ASR_PARALLEL_PROCS > 1 and len(audio) >= ASR_PARALLEL_MIN_SECONDS * ASR_SAMPLE_RATE:
+            yield from transcribe_parallel(audio)
+            return
+        with get_asr_pool().checkout() as model:
+            segments, _ = model.transcribe(audio, language="en")
+            for seg in segments:
+                yield seg.start, seg.end, seg.text
+
+
+def iter_cached_segments(video_path: str, audio_mode: str = ASR_AUDIO_MODE, source=None):
+    """iter_segments(), served from the content-addressed cache when this exact video was seen before.
+
+    ``source`` is called for the segments on a miss (defaults to decoding ``video_path``).
+    """
+    key = result_cache.cache_key("transcript", result_cache.file_digest(video_path),
+                                 model=ASR_MODEL_SIZE, language="en", audio=audio_mode)
+    cached = result_cache.read_text(key, ".segments.json")
+    if cached is not None:
+        print(f"Transcript cache hit for {video_path}")
+        for start, end, text in json.loads(cached):
+            yield start, end, text
+        return
+
+    segments = []
+    for seg in source() if source else iter_segments(video_path):
+        segments.append(seg)
+        yield seg
+    # Only complete transcripts are cached (a cancelled stream never gets here)
+    result_cache.store_text(key, json.dumps([[float(a), float(b), t] for a, b, t in segments]), ".segments.json")
+
+
+# Concurrent requests for the same video (unary, streaming or from report generation) share one ASR run
+_inflight = SingleFlight()
+
+
+def transcribe_once(video_path: str) -> str:
+    key = ("transcript", result_cache.file_digest(video_path))
+    transcript, shared = _inflight.do(key, lambda: " ".join(text for _, _, text in iter_cached_segments(video_path)))
+    if shared:
+        print(f"Joined in-flight transcription of {video_path}")
+    return transcript
+
+
+def save_transcript(video_path: str, transcript: str) -> str:
+    # Save transcript to .txt for later report generation
+    txt_path = os.path.splitext(video_path)[0] + ".txt"
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write(transcript)
+    return txt_path
+
 
 class TranscriptionServicer(video_analysis_pb2_grpc.VideoAnalysisServicer):
     def TranscribeVideo(self, request, context):
+        readiness.require(context)
         video_path = request.file_path
         try:
-            # Extract audio from the uploaded video
-            wav_path = extract_audio_to_wav(video_path)
-
             # Run local speech-to-text if ASR is available
             if _HAS_ASR:
-                model = WhisperModel(ASR_MODEL_SIZE, device="cpu")
-                segments, info = model.transcribe(wav_path, language="en") # Force English
-                transcript = " ".join([seg.text for seg in segments])
+                transcript = transcribe_once(video_path)
             else:
                 # fallback if no ASR installed
+                wav_path = extract_audio_to_wav(video_path)
                 transcript = (
                     f"(No local ASR installed) Audio saved at {wav_path}. "
                     f"To enable speech-to-text, install faster-whisper and rerun."
                 )
-                
-            # Save transcript to .txt for later report generation
-            txt_path = os.path.splitext(wav_path)[0] + ".txt"
-            with open(txt_path, "w", encoding="utf-8") as f:
-                f.write(transcript)
+
+            save_transcript(video_path, transcript)
             return video_analysis_pb2.TextResponse(transcript=transcript)
         except Exception as e:
             return video_analysis_pb2.TextResponse(transcript=f"Error: {str(e)}")
 
+    def StreamTranscribeVideo(self, request, context):
+        # Yield each segment as soon as faster-whisper decodes it
+        readiness.require(context)
+        video_path = request.file_path
+        if not _HAS_ASR:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION,
+                          "No local ASR installed. Install faster-whisper and rerun.")
+        if not os.path.exists(video_path):
+            context.abort(grpc.StatusCode.NOT_FOUND, f"File not found: {video_path}")
+
+        key = ("transcript", result_cache.file_digest(video_path))
+        future, leader = _inflight.claim(key)
+        texts, error, complete = [], None, False
+        try:
+            if not leader:
+                # Same video already being transcribed: wait for it, then replay from the cache
+                print(f"Joined in-flight transcription of {video_path}")
+                try:
+                    future.result()
+                except CancelledError:
+                    pass  # that client went away mid-stream; transcribe here instead
+            for i, (start, end, text) in enumerate(iter_cached_segments(video_path)):
+                texts.append(text)
+                yield video_analysis_pb2.TranscriptSegment(index=i, start=start, end=end, text=text)
+            complete = True
+        except Exception as e:
+            error = e
+            context.abort(grpc.StatusCode.INTERNAL, str(e))
+        finally:
+            if leader and complete:
+                _inflight.release(key, future, " ".join(texts))
+            elif leader and error is not None:
+                _inflight.release(key, future, error=error)
+            elif leader:
+                _inflight.abandon(key, future)  # client went away; a waiter takes over
+        save_transcript(video_path, " ".join(texts))
+
+    def TranscribeAudio(self, request_iterator, context):
+        # Audio demuxed by the caller (shared ingest); chunks are transcribed as they arrive
+        readiness.require(context)
+        first = next(request_iterator, None)
+        if first is None or not first.file_path:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "First message must carry file_path.")
+        if not _HAS_ASR:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION,
+                          "No local ASR installed. Install faster-whisper and rerun.")
+        video_path = first.file_path
+        if first.sample_rate and first.sample_rate != ASR_SAMPLE_RATE:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Audio must be {ASR_SAMPLE_RATE} Hz.")
+
+        def chunks():
+            for msg in itertools.chain([first], request_iterator):
+                if msg.pcm:
+                    yield np.frombuffer(msg.pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+        def run():
+            segments = iter_cached_segments(video_path, "ingest", lambda: transcribe_chunks(chunks()))
+            return " ".join(text for _, _, text in segments)
+
+        try:
+            # A transcript that is cached, or already being produced by another call, is returned
+            # without reading the PCM stream; the gateway then stops demuxing audio
+            transcript, _ = _inflight.do(("transcript-ingest", result_cache.file_digest(video_path)), run)
+        except Exception as e:
+            context.abort(grpc.StatusCode.INTERNAL, str(e))
+        save_transcript(video_path, transcript)
+        return video_analysis_pb2.TextResponse(transcript=transcript)
+
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=ASR_MAX_WORKERS), options=server_options(),
+                         maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS["transcription"])
     video_analysis_pb2_grpc.add_VideoAnalysisServicer_to_server(TranscriptionServicer(), server)
-    server.add_insecure_port('[::]:50051')
-    print("Transcription Agent running on port 50051")
+    readiness.attach(server)
+    port = agent_port("transcription")
+    server.add_insecure_port(f'[::]:{port}')
+    print(f"Transcription Agent running on port {port} ({ASR_MAX_WORKERS} warm models x {ASR_CPU_THREADS} threads, audio={ASR_AUDIO_MODE})")
     server.start()
+    # Port is bound; import faster-whisper and load the models while health reports NOT_SERVING
+    readiness.start()
     server.wait_for_termination()
 
 if __name__ == "__main__":
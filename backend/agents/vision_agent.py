@@ -1,64 +1,278 @@
 from concurrent import futures
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
 import grpc
 import cv2
+import numpy as np
 from pathlib import Path
 from PIL import Image
-from transformers import pipeline
 from grpc_services import video_analysis_pb2, video_analysis_pb2_grpc
+from grpc_services.channels import GRPC_MAX_CONCURRENT_RPCS, server_options
+from grpc_services.registry import agent_port
+from grpc_services.readiness import Readiness
+from model.frame_sampler import SAMPLING_MODES, frame_step, iter_sampled_frames, probe_video, split_frame_range
+from model.detection_store import DetectionStore, format_span
+from model.scene_detect import SceneChangeFilter
+from model.stage_pipeline import StagedPipeline
+import result_cache
+from singleflight import SingleFlight
 
 import warnings
 warnings.filterwarnings("ignore", message=".*meta parameter.*")
 
-# Initialize Hugging Face object detection model 
-detector = pipeline("object-detection", model="models/detr-resnet-50")
-
 UPLOADS_DIR = Path(__file__).resolve().parents[1] / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
-class VisionServicer(video_analysis_pb2_grpc.VideoAnalysisServicer):
-    def AnalyzeVideo(self, request, context):
-        video_path = request.file_path
-        path = Path(video_path)
+# Confidence for reported labels; the detection store keeps everything down to STORE_MIN_SCORE
+VISION_MIN_SCORE = float(os.environ.get("VISION_MIN_SCORE", "0.5"))
+VISION_STORE_MIN_SCORE = float(os.environ.get("VISION_STORE_MIN_SCORE", "0.3"))
 
-        if not path.exists():
-            return video_analysis_pb2.AnalysisResponse(objects=["File not found"], graphs=[])
+# Micro-batching: frames per detector call, and how long a partial batch may wait
+VISION_BATCH_SIZE = int(os.environ.get("VISION_BATCH_SIZE", "4"))
+VISION_BATCH_MAX_LATENCY_MS = int(os.environ.get("VISION_BATCH_MAX_LATENCY_MS", "500"))
 
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            return video_analysis_pb2.AnalysisResponse(objects=["Unable to open video"], graphs=[])
+# Frame sampling: default mode (overridable per request) and seconds between samples
+VISION_SAMPLING_MODE = os.environ.get("VISION_SAMPLING_MODE", "grab")
+VISION_SAMPLE_INTERVAL_S = float(os.environ.get("VISION_SAMPLE_INTERVAL_S", "2"))
+
+# Frame selection: fixed "interval" or adaptive "scene" (frames-per-minute budget)
+VISION_FRAME_SELECTOR = os.environ.get("VISION_FRAME_SELECTOR", "interval")
+VISION_SCENE_MIN_FPM = float(os.environ.get("VISION_SCENE_MIN_FPM", "2"))
+VISION_SCENE_MAX_FPM = float(os.environ.get("VISION_SCENE_MAX_FPM", "60"))
+
+# Bounded queue depth between decode -> preprocess -> infer stages
+VISION_QUEUE_SIZE = int(os.environ.get("VISION_QUEUE_SIZE", "4"))
+
+# Time-range sharding across worker processes: "auto" or a fixed count (1 disables)
+VISION_SHARDS = os.environ.get("VISION_SHARDS", "auto")
+VISION_SHARD_MIN_SECONDS = float(os.environ.get("VISION_SHARD_MIN_SECONDS", "300"))
+VISION_SHARD_THREADS = int(os.environ.get("VISION_SHARD_THREADS", "2"))  # torch threads per shard
+
+# Detection backend: "detr" (transformers pipeline) or "openvino" (compiled SSD-style IR model)
+VISION_BACKEND = os.environ.get("VISION_BACKEND", "detr")
+OV_DETECTION_MODEL = os.environ.get("OV_DETECTION_MODEL", "models/ov-detector/model.xml")
+OV_DETECTION_LABELS = os.environ.get("OV_DETECTION_LABELS", "models/ov-detector/labels.txt")
+OV_DEVICE = os.environ.get("OV_DEVICE", "CPU")
+
+# Built by load_detector(): in the background once the port is bound, or when a shard worker starts
+detector = None
+ov_detector = None
+
+
+def load_detector():
+    global detector, ov_detector
+    if detector is not None or ov_detector is not None:
+        return
+    if VISION_BACKEND == "openvino":
+        # Faster CPU path: shared compiled model with several async infer requests in flight
+        from model.openvino_model import AsyncDetector, load_labels
+        ov_detector = AsyncDetector(OV_DETECTION_MODEL, OV_DEVICE, labels=load_labels(OV_DETECTION_LABELS))
+    else:
+        # Initialize Hugging Face object detection model
+        from transformers import pipeline
+        detector = pipeline("object-detection", model="models/detr-resnet-50")
+
+
+readiness = Readiness("Vision Agent", load_detector)
+
+
+def prepare_frame(frame):
+    # Detector input for one BGR frame: PIL (RGB) for DETR, NCHW tensor + size for OpenVINO
+    if ov_detector is not None:
+        height, width = frame.shape[:2]
+        return ov_detector.preprocess(frame), (width, height)
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
 
-        frame_rate = int(cap.get(cv2.CAP_PROP_FPS)) or 15
-        frame_interval = frame_rate * 2  # analyze every 2 secs
 
-        detected_labels = set()
-        frame_idx = 0
+def detect_batch(images):
+    # Run the detector on a list of prepared frames in one call
+    if not images:
+        return []
+    if ov_detector is not None:
+        raw = dict(ov_detector.infer_many((i, tensor) for i, (tensor, _) in enumerate(images)))
+        return [ov_detector.parse(raw[i], size, VISION_STORE_MIN_SCORE) for i, (_, size) in enumerate(images)]
+    if len(images) == 1:
+        return [detector(images[0], threshold=VISION_STORE_MIN_SCORE)]
+    return detector(images, batch_size=len(images), threshold=VISION_STORE_MIN_SCORE)
 
+
+class FrameBatcher:
+    """Collects sampled frames into micro-batches for the detector.
+
+    A batch is flushed when it is full or when its oldest frame has waited
+    longer than ``max_latency_ms``, so short videos are not held back.
+    """
+
+    def __init__(self, batch_size: int = VISION_BATCH_SIZE, max_latency_ms: int = VISION_BATCH_MAX_LATENCY_MS):
+        self.batch_size = max(1, batch_size)
+        self.max_latency = max_latency_ms / 1000.0
+        self._keys = []
+        self._images = []
+        self._oldest = 0.0
+
+    def add(self, key, image):
+        # Queue one frame; returns [(key, detections), ...] for any flushed batch
+        if not self._images:
+            self._oldest = time.monotonic()
+        self._keys.append(key)
+        self._images.append(image)
+        if len(self._images) >= self.batch_size:
+            return self.flush()
+        return self.poll()
+
+    def remaining(self):
+        # Seconds until the pending batch must be flushed (None when empty)
+        if not self._images:
+            return None
+        return max(0.0, self.max_latency - (time.monotonic() - self._oldest))
+
+    def poll(self):
+        # Flush a partial batch once its latency budget is spent
+        if self._images and time.monotonic() - self._oldest >= self.max_latency:
+            return self.flush()
+        return []
+
+    def flush(self):
+        if not self._images:
+            return []
+        keys, images = self._keys, self._images
+        self._keys, self._images = [], []
+        return list(zip(keys, detect_batch(images)))
+
+
+def sample_interval(selector: str) -> float:
+    # Scene mode samples candidates at the max frames-per-minute budget
+    if selector == "scene":
+        return 60.0 / max(VISION_SCENE_MAX_FPM, 1e-6)
+    return VISION_SAMPLE_INTERVAL_S
+
+
+def detect_frames(frames, scene=None, label="") -> DetectionStore:
+    """Detect objects in ``((frame_idx, ts), bgr)`` items and return every detection.
+
+    ``frames`` is consumed on a decoder thread, overlapped with preprocessing
+    and with batched inference on the calling thread.
+    """
+    rows = []
+    frame_times = []
+    # OpenVINO: make each batch big enough to fill every async infer request
+    batcher = FrameBatcher(max(VISION_BATCH_SIZE, ov_detector.jobs) if ov_detector else VISION_BATCH_SIZE)
+
+    def collect(batch_results):
+        # Keep every detection as a row for the columnar store
+        for (frame_idx, ts), results in batch_results:
+            frame_times.append(ts)
+            for r in results:
+                box = r["box"]
+                bbox = (box["xmin"], box["ymin"], box["xmax"], box["ymax"])
+                rows.append((frame_idx, ts, r["label"], r["score"], bbox))
+
+    def decode():
+        # Scene mode drops candidates that look like the last analyzed frame
+        for key, frame in frames:
+            if scene and not scene.accept(key[1], frame):
+                continue
+            yield key, frame
+
+    def preprocess(item):
+        key, frame = item
+        return key, prepare_frame(frame)
+
+    # Inference runs here, overlapped with decode/preprocess on worker threads
+    with StagedPipeline(decode(), [("preprocess", preprocess)], VISION_QUEUE_SIZE) as pipe:
         while True:
-            ret, frame = cap.read()
-            if not ret:
+            try:
+                item = pipe.get(timeout=batcher.remaining())
+            except queue.Empty:
+                collect(batcher.poll())
+                continue
+            if item is pipe.DONE:
                 break
+            collect(batcher.add(*item))
+        collect(batcher.flush())
+    print(f"[Vision pipeline] {label}: {pipe.report()}")
+
+    return DetectionStore.from_rows(rows, frame_times, scene.skipped if scene else 0)
+
+
+def scene_filter(selector: str):
+    return SceneChangeFilter(VISION_SCENE_MIN_FPM, VISION_SCENE_MAX_FPM) if selector == "scene" else None
 
-            # Only process selected frames to save time
-            if frame_idx % frame_interval == 0:
-                # Convert OpenCV frame (BGR) to PIL (RGB)
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_image = Image.fromarray(rgb_frame)
 
-                # Run detection
-                results = detector(pil_image)
+def analyze_range(path, mode, selector, info, start_frame=0, end_frame=None) -> DetectionStore:
+    """Detect objects in one frame range of a video and return every detection."""
+    # Decoder thread: only decode the frames we actually analyze
+    frames = (((frame_idx, ts), frame) for frame_idx, ts, frame
+              in iter_sampled_frames(path, sample_interval(selector), mode, info, start_frame, end_frame))
+    return detect_frames(frames, scene_filter(selector), f"frames {start_frame}-{end_frame or 'end'}")
 
-                # Collect unique, confident object labels
-                for r in results:
-                    if r["score"] >= 0.5:
-                        detected_labels.add(r["label"])
 
-            frame_idx += 1
+def choose_shard_count(duration: float) -> int:
+    if VISION_SHARDS != "auto":
+        return max(1, int(VISION_SHARDS))
+    cores = os.cpu_count() or 1
+    return max(1, min(cores // max(VISION_SHARD_THREADS, 1), int(duration // VISION_SHARD_MIN_SECONDS)))
 
-        cap.release()
+
+_shard_pool = None
+_shard_pool_lock = threading.Lock()
+
+
+def _init_shard_worker():
+    # Each worker process has its own detector; keep its torch threads in budget
+    import torch
+    torch.set_num_threads(max(VISION_SHARD_THREADS, 1))
+    load_detector()
+
+
+def _analyze_shard(args):
+    return analyze_range(*args)
+
+
+def get_shard_pool():
+    # Spawned (not forked) so every worker loads a clean detector instance
+    global _shard_pool
+    with _shard_pool_lock:
+        if _shard_pool is None:
+            workers = max(2, (os.cpu_count() or 1) // max(VISION_SHARD_THREADS, 1))
+            _shard_pool = futures.ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_shard_worker,
+            )
+        return _shard_pool
+
+
+# Identical concurrent requests (same video bytes and settings) share one detection run
+_inflight = SingleFlight()
+
+
+class VisionServicer(video_analysis_pb2_grpc.VideoAnalysisServicer):
+    def _model_params(self, selector):
+        return dict(
+            backend=VISION_BACKEND,
+            model=OV_DETECTION_MODEL if VISION_BACKEND == "openvino" else "models/detr-resnet-50",
+            selector=selector,
+            scene_fpm=(VISION_SCENE_MIN_FPM, VISION_SCENE_MAX_FPM) if selector == "scene" else None,
+            min_score=VISION_STORE_MIN_SCORE,
+        )
+
+    def _respond(self, path, store, store_path):
+        counts = store.label_counts(VISION_MIN_SCORE)
+        detected_labels = sorted(counts)
+        timelines = store.timelines(VISION_MIN_SCORE)
+        graphs = [
+            f"{label}: " + ", ".join(format_span(a, b) for a, b in timelines[label])
+            for label in detected_labels
+        ]
 
         # Prepare final summary
         if detected_labels:
-            summary_text = "Objects detected:\n" + "\n".join(sorted(detected_labels))
+            summary_text = "Objects detected:\n" + "\n".join(detected_labels)
         else:
             summary_text = "No objects detected."
 
@@ -67,19 +281,120 @@ class VisionServicer(video_analysis_pb2_grpc.VideoAnalysisServicer):
         vision_txt_path.write_text(summary_text, encoding="utf-8")
 
         print(f"Vision summary saved: {vision_txt_path}")
-        print(f"Detected objects:\n{summary_text}")
+        print(f"Detections saved: {store_path} ({len(store)} rows)")
+        print(f"Frames analyzed: {store.frames_analyzed}, skipped as unchanged: {store.frames_skipped}")
+        print(f"Detected objects: {counts}")
 
-        # Return list of unique objects to API
+        # Return list of unique objects (and when they appear) to API
         return video_analysis_pb2.AnalysisResponse(
-            objects=list(sorted(detected_labels)), graphs=[]
+            objects=detected_labels, graphs=graphs,
+            frames_analyzed=store.frames_analyzed, frames_skipped=store.frames_skipped,
         )
 
+    def AnalyzeVideo(self, request, context):
+        readiness.require(context)
+        video_path = request.file_path
+        path = Path(video_path)
+
+        if not path.exists():
+            return video_analysis_pb2.AnalysisResponse(objects=["File not found"], graphs=[])
+
+        mode = request.sampling_mode or VISION_SAMPLING_MODE
+        if mode not in SAMPLING_MODES:
+            return video_analysis_pb2.AnalysisResponse(objects=[f"Unknown sampling mode: {mode}"], graphs=[])
+
+        selector = request.frame_selector or VISION_FRAME_SELECTOR
+        if selector not in ("interval", "scene"):
+            return video_analysis_pb2.AnalysisResponse(objects=[f"Unknown frame selector: {selector}"], graphs=[])
+
+        # Same video bytes + same detector settings -> reuse the stored detections
+        store_path = UPLOADS_DIR / f"{path.stem}.detections.npz"
+        key = result_cache.cache_key("detections", result_cache.file_digest(path), mode=mode,
+                                     interval=sample_interval(selector), **self._model_params(selector))
+
+        def run():
+            if result_cache.restore(key, ".npz", store_path):
+                print(f"Detection cache hit for {path.name}")
+                return DetectionStore.load(store_path)
+            info = probe_video(path)
+            if info is None:
+                return None
+
+            # Long videos: analyze time ranges in parallel worker processes
+            shards = choose_shard_count(info["duration"]) if info["frame_count"] > 0 else 1
+            if shards > 1:
+                step = frame_step(info["fps"], sample_interval(selector))
+                ranges = split_frame_range(info["frame_count"], step, shards)
+                print(f"Sharding {path.name} ({info['duration']:.0f}s) into {len(ranges)} ranges")
+                jobs = [(str(path), mode, selector, info, a, b) for a, b in ranges]
+                store = DetectionStore.concat(get_shard_pool().map(_analyze_shard, jobs))
+            else:
+                store = analyze_range(path, mode, selector, info)
+
+            # Keep every detection so thresholds/timelines can be re-queried without DETR
+            store.save(store_path)
+            result_cache.store(key, ".npz", store_path)
+            return store
+
+        store, shared = _inflight.do(key, run)
+        if store is None:
+            return video_analysis_pb2.AnalysisResponse(objects=["Unable to open video"], graphs=[])
+        if shared:
+            print(f"Joined in-flight detection for {path.name}")
+            store.save(store_path)  # the other request wrote next to its own upload
+        return self._respond(path, store, store_path)
+
+    def AnalyzeFrames(self, request_iterator, context):
+        # Frames demuxed by the caller (shared ingest) instead of decoding the file here
+        readiness.require(context)
+        first = next(request_iterator, None)
+        if first is None or not first.file_path:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "First message must carry file_path.")
+        path = Path(first.file_path)
+        if not path.exists():
+            return video_analysis_pb2.AnalysisResponse(objects=["File not found"], graphs=[])
+
+        # JPEG round trip differs slightly from local decoding, so these results get their own key
+        selector = VISION_FRAME_SELECTOR
+        store_path = UPLOADS_DIR / f"{path.stem}.detections.npz"
+        key = result_cache.cache_key("detections", result_cache.file_digest(path), mode="ingest",
+                                     interval=round(first.interval, 3), **self._model_params(selector))
+
+        def run():
+            if result_cache.restore(key, ".npz", store_path):
+                print(f"Detection cache hit for {path.name}")
+                return DetectionStore.load(store_path)
+
+            def frames():
+                for msg in itertools.chain([first], request_iterator):
+                    if msg.jpeg:
+                        frame = cv2.imdecode(np.frombuffer(msg.jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                        yield (msg.index, msg.timestamp), frame
+
+            store = detect_frames(frames(), scene_filter(selector), f"{path.name} (shared ingest)")
+            store.save(store_path)
+            result_cache.store(key, ".npz", store_path)
+            return store
+
+        # Answering from the detection store of a cached or concurrent run ends the RPC early,
+        # which is the gateway's cue to stop encoding frames
+        store, shared = _inflight.do(key, run)
+        if shared:
+            store.save(store_path)
+        return self._respond(path, store, store_path)
+
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2), options=server_options(),
+                         maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS["vision"])
     video_analysis_pb2_grpc.add_VideoAnalysisServicer_to_server(VisionServicer(), server)
-    server.add_insecure_port('[::]:50052')
-    print("Vision Agent running (DETR mode) on port 50052")
+    readiness.attach(server)
+    port = agent_port("vision")
+    server.add_insecure_port(f'[::]:{port}')
+    backend = f"OpenVINO on {OV_DEVICE}" if VISION_BACKEND == "openvino" else "DETR mode"
+    print(f"Vision Agent running ({backend}, batch={VISION_BATCH_SIZE}, sampling={VISION_SAMPLING_MODE}) on port {port}")
     server.start()
+    # Port is bound; load the detector while health reports NOT_SERVING
+    readiness.start()
     server.wait_for_termination()
 
 if __name__ == "__main__":
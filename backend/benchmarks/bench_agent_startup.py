@@ -0,0 +1,123 @@
+"""Agent startup: time to bind the port vs time until models are loaded.
+
+Run from the backend folder (with the agents stopped, so their ports are free):
+    python -m benchmarks.bench_agent_startup [--agents vision generation] [--no-serve]
+
+For each agent, a fresh interpreter reports the breakdown of
+  module  - importing the agent module (all that runs before the port is bound)
+  libs    - heavy libraries imported by the background loader
+  models  - building the models themselves
+and then the real agent process is started and polled with gRPC health
+checks for the time to first response (port bound) and to SERVING.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import grpc
+from grpc_health.v1 import health_pb2, health_pb2_grpc
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# name -> (module, loader, port, libraries the loader imports)
+AGENTS = {
+    "transcription": ("agents.transcription_agent", "load_asr", 50051, ["faster_whisper"]),
+    "vision": ("agents.vision_agent", "load_detector", 50052, ["torch", "transformers"]),
+    "generation": ("agents.generation_agent", "load_models", 50053, ["torch", "transformers", "pptx", "reportlab.pdfgen.canvas"]),
+    "mcp": ("server.local_mcp_server", "load_matcher", 50054, ["torch", "sentence_transformers"]),
+}
+
+CHILD = """
+import importlib, json, sys, time
+t0 = time.perf_counter()
+mod = importlib.import_module(sys.argv[1])
+t1 = time.perf_counter()
+libs = {}
+for lib in sys.argv[3:]:
+    start = time.perf_counter()
+    try:
+        importlib.import_module(lib)
+    except ImportError:
+        pass
+    libs[lib] = time.perf_counter() - start
+t2 = time.perf_counter()
+getattr(mod, sys.argv[2])()
+t3 = time.perf_counter()
+print("RESULT " + json.dumps({"module": t1 - t0, "libs": libs, "models": t3 - t2}))
+"""
+
+
+def breakdown(module, loader, libs):
+    out = subprocess.run([sys.executable, "-c", CHILD, module, loader, *libs], cwd=BACKEND_DIR,
+                         capture_output=True, text=True)
+    for line in out.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "no result")
+
+
+def time_to_serving(module, port, limit_s=600.0):
+    # (seconds until the health service answers, seconds until it reports SERVING)
+    proc = subprocess.Popen([sys.executable, "-m", module], cwd=BACKEND_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    start = time.perf_counter()
+    bound = None
+    try:
+        while time.perf_counter() - start < limit_s:
+            if proc.poll() is not None:
+                raise RuntimeError(f"exited with code {proc.returncode}")
+            # Fresh channel per probe: a reused one would sit in reconnect backoff after the first refusal
+            channel = grpc.insecure_channel(f"localhost:{port}")
+            try:
+                status = health_pb2_grpc.HealthStub(channel).Check(
+                    health_pb2.HealthCheckRequest(service=""), timeout=0.5).status
+            except grpc.RpcError:
+                time.sleep(0.05)
+                continue
+            finally:
+                channel.close()
+            if bound is None:
+                bound = time.perf_counter() - start
+            if status == health_pb2.HealthCheckResponse.SERVING:
+                return bound, time.perf_counter() - start
+            time.sleep(0.05)
+        return bound, None
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", nargs="+", choices=list(AGENTS), default=list(AGENTS))
+    parser.add_argument("--no-serve", action="store_true", help="skip starting the real agent processes")
+    args = parser.parse_args()
+
+    for name in args.agents:
+        module, loader, port, libs = AGENTS[name]
+        try:
+            b = breakdown(module, loader, libs)
+        except RuntimeError as e:
+            print(f"{name:<13} failed: {e}")
+            continue
+        lib_times = ", ".join(f"{lib} {t:.2f}s" for lib, t in b["libs"].items())
+        print(f"{name:<13} module {b['module']:.2f}s | libs {sum(b['libs'].values()):.2f}s ({lib_times}) "
+              f"| models {b['models']:.2f}s")
+        if not args.no_serve:
+            try:
+                bound, serving = time_to_serving(module, port)
+            except RuntimeError as e:
+                print(f"{'':<13} agent process {e}")
+                continue
+            if bound is None:
+                print(f"{'':<13} port never answered")
+                continue
+            serving_text = f"{serving:.2f}s" if serving is not None else "not within limit"
+            print(f"{'':<13} port answering after {bound:.2f}s, SERVING after {serving_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Time-to-first-segment: per-request WhisperModel vs the warm model pool.
+
+Run from the backend folder:
+    python -m benchmarks.bench_asr_warm_pool [video.mp4] [--runs 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from faster_whisper import WhisperModel
+
+from agents.transcription_agent import ASR_MODEL_SIZE, WhisperPool, import_asr
+from model.openvino_model import extract_audio_to_wav
+
+DEFAULT_VIDEO = Path(__file__).resolve().parents[2] / "sample_data" / "sample_pitch.mp4"
+
+
+def first_segment(model, wav_path):
+    segments, _ = model.transcribe(wav_path, language="en")
+    next(iter(segments), None)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("video", nargs="?", default=str(DEFAULT_VIDEO))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    import_asr()
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = extract_audio_to_wav(args.video, os.path.join(tmp, "audio.wav"))
+
+        cold = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            first_segment(WhisperModel(ASR_MODEL_SIZE, device="cpu"), wav_path)
+            cold.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        pool = WhisperPool(size=1)
+        load = time.perf_counter() - start
+        warm = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            with pool.checkout() as model:
+                first_segment(model, wav_path)
+            warm.append(time.perf_counter() - start)
+
+    print(f"model '{ASR_MODEL_SIZE}', {args.runs} runs, pool load {load:.2f}s (paid once at startup)")
+    print(f"per-request load : {min(cold):.2f}s best / {sum(cold) / len(cold):.2f}s mean to first segment")
+    print(f"warm pool        : {min(warm):.2f}s best / {sum(warm) / len(warm):.2f}s mean to first segment")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""/clarify throughput: a new gRPC channel per request vs one pooled channel.
+
+Run from the backend folder, with the MCP server running:
+    python -m benchmarks.bench_clarify_load [--concurrency 1 8 32] [--seconds 10]
+    python -m benchmarks.bench_clarify_load --url http://127.0.0.1:8000   # also load the gateway
+    python -m benchmarks.bench_clarify_load --queries "make a pdf" "slides please"
+
+The gRPC comparison calls ClarifyQuery the way the gateway used to (open a
+channel, call, close it) and the way it does now (a shared ChannelManager
+channel). ``--url`` additionally drives the gateway's /clarify endpoint over
+keep-alive HTTP connections, so it measures whichever gateway is running.
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+import grpc
+
+from grpc_services import video_analysis_pb2, video_analysis_pb2_grpc
+from grpc_services.channels import ChannelManager
+
+QUERIES = ["transcribe this video", "what objects are in it", "make me a pdf report", "hello there"]
+
+
+def load(call, concurrency: int, seconds: float):
+    # Run ``call(i)`` from ``concurrency`` threads for ``seconds``; returns (requests/s, latencies, errors)
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def worker(n):
+        i = n
+        mine, failed = [], 0
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                call(i)
+                mine.append(time.perf_counter() - start)
+            except Exception:
+                failed += 1
+            i += concurrency
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(latencies) / (time.perf_counter() - start), latencies, errors[0]
+
+
+def report(label: str, result):
+    rps, latencies, errors = result
+    if not latencies:
+        print(f"{label:<28} no successful requests ({errors} errors)")
+        return
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{label:<28} {rps:8.1f} req/s | p50 {p50:6.2f} ms | p99 {p99:6.2f} ms | errors {errors}")
+
+
+def per_call_channel(target: str, queries):
+    def call(i):
+        channel = grpc.insecure_channel(target)
+        try:
+            stub = video_analysis_pb2_grpc.VideoAnalysisStub(channel)
+            stub.ClarifyQuery(video_analysis_pb2.ClarificationRequest(query=queries[i % len(queries)]), timeout=5)
+        finally:
+            channel.close()
+    return call
+
+
+def pooled_channel(manager: ChannelManager, queries):
+    def call(i):
+        with manager.call("mcp") as stub:
+            stub.ClarifyQuery(video_analysis_pb2.ClarificationRequest(query=queries[i % len(queries)]),
+                              timeout=manager.timeout("mcp"))
+    return call
+
+
+def gateway(url: str, queries):
+    parsed = urlparse(url)
+    local = threading.local()  # one keep-alive connection per load thread
+
+    def call(i):
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+        try:
+            conn.request("POST", "/clarify?" + urlencode({"query": queries[i % len(queries)]}))
+            resp = conn.getresponse()
+            resp.read()
+        except Exception:
+            conn.close()
+            local.conn = None
+            raise
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status}")
+    return call
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--url", help="gateway base URL, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--queries", nargs="+", default=QUERIES)
+    args = parser.parse_args()
+
+    manager = ChannelManager()
+    target = manager.registry.replicas["mcp"][0].target
+    try:
+        grpc.channel_ready_future(manager.channel(target)).result(timeout=10)  # connect outside the timed runs
+        for concurrency in args.concurrency:
+            print(f"concurrency {concurrency}:")
+            report("  gRPC, channel per request", load(per_call_channel(target, args.queries), concurrency, args.seconds))
+            report("  gRPC, pooled channel", load(pooled_channel(manager, args.queries), concurrency, args.seconds))
+            if args.url:
+                report("  gateway /clarify", load(gateway(args.url, args.queries), concurrency, args.seconds))
+    finally:
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Latency of /clarify and /generate with agents over gRPC vs embedded in the gateway process.
+
+Run from the backend folder. The transport comparison calls ClarifyQuery and
+GenerateReport through a ChannelManager of each kind, so the gRPC run needs
+the agents running (.\\run_all.ps1) and the embedded run loads them here:
+    python -m benchmarks.bench_embedded_latency --video uploads/sample_pitch.mp4 [--iterations 200]
+    python -m benchmarks.bench_embedded_latency --transports embedded   # no agents needed
+
+``--urls`` instead drives the endpoints of running gateways, e.g. one
+started normally and one with AGENT_TRANSPORT=embedded on another port:
+    python -m benchmarks.bench_embedded_latency --video sample_pitch.mp4 \\
+        --urls http://127.0.0.1:8000 http://127.0.0.1:8001
+
+The first /generate call of a run renders the report; the timed calls after
+it come from the result cache, so the numbers are mostly transport overhead.
+"""
+import argparse
+import http.client
+import statistics
+import time
+from urllib.parse import urlencode, urlparse
+
+from grpc_services import video_analysis_pb2
+from grpc_services.channels import ChannelManager
+
+QUERIES = ["transcribe this video", "what objects are in it", "make me a pdf report", "hello there"]
+
+
+def measure(call, iterations: int):
+    # One untimed warm-up call (connect, load models, fill the caches), then ``iterations`` timed ones
+    call(0)
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        call(i)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label: str, latencies):
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    mean = statistics.fmean(latencies) * 1000
+    print(f"{label:<34} mean {mean:8.3f} ms | p50 {p50:8.3f} ms | p99 {p99:8.3f} ms")
+
+
+def transport_calls(manager: ChannelManager, video: str, report_type: str, queries):
+    def clarify(i):
+        with manager.call("mcp") as stub:
+            stub.ClarifyQuery(video_analysis_pb2.ClarificationRequest(query=queries[i % len(queries)]),
+                              timeout=manager.timeout("mcp"))
+
+    def generate(i):
+        with manager.call("generation") as stub:
+            stub.GenerateReport(video_analysis_pb2.ReportRequest(
+                file_path=video, report_type=report_type, report_types=[report_type]),
+                timeout=manager.timeout("generation"))
+
+    return clarify, generate
+
+
+def gateway_calls(url: str, video: str, report_type: str, queries):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=3600)
+
+    def post(path, params):
+        conn.request("POST", f"{path}?{urlencode(params)}")
+        resp = conn.getresponse()
+        resp.read()
+        if resp.status != 200:
+            raise RuntimeError(f"{path}: HTTP {resp.status}")
+
+    def clarify(i):
+        post("/clarify", {"query": queries[i % len(queries)]})
+
+    def generate(i):
+        post("/generate", {"file_name": video, "report_type": report_type})
+
+    return clarify, generate
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", help="video for /generate: a path for --transports, a file name in uploads/ for --urls")
+    parser.add_argument("--report-type", default="pdf", choices=["pdf", "pptx"])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--transports", nargs="+", default=["grpc", "embedded"], choices=["grpc", "embedded"])
+    parser.add_argument("--urls", nargs="+", help="gateway base URLs to compare instead of the transports")
+    parser.add_argument("--queries", nargs="+", default=QUERIES)
+    args = parser.parse_args()
+
+    if args.urls:
+        runs = [(url, gateway_calls(url, args.video, args.report_type, args.queries), None) for url in args.urls]
+    else:
+        runs = []
+        for transport in args.transports:
+            manager = ChannelManager(transport=transport)
+            runs.append((transport, transport_calls(manager, args.video, args.report_type, args.queries), manager))
+
+    for label, (clarify, generate), manager in runs:
+        print(f"{label}:")
+        try:
+            report("  /clarify (ClarifyQuery)", measure(clarify, args.iterations))
+            if args.video:
+                report(f"  /generate {args.report_type} (GenerateReport)", measure(generate, args.iterations))
+        finally:
+            if manager is not None:
+                manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Decode time of each frame-sampling mode against video length.
+
+Longer inputs are built by stream-copying the sample clip in a loop, so
+no re-encoding is needed. Run from the backend folder:
+    python -m benchmarks.bench_frame_sampling [video.mp4] [--lengths 1 5 20]
+"""
+import argparse
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import imageio_ffmpeg as iio_ffmpeg
+
+from model.frame_sampler import SAMPLING_MODES, iter_sampled_frames, probe_video
+
+DEFAULT_VIDEO = Path(__file__).resolve().parents[2] / "sample_data" / "sample_pitch.mp4"
+
+
+def looped_copy(src, loops, out_dir):
+    out = Path(out_dir) / f"loop_{loops}.mp4"
+    cmd = [
+        iio_ffmpeg.get_ffmpeg_exe(), "-y", "-stream_loop", str(loops - 1),
+        "-i", str(src), "-c", "copy", str(out),
+    ]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("video", nargs="?", default=str(DEFAULT_VIDEO))
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1, 5, 20],
+                        help="number of times to loop the clip")
+    parser.add_argument("--interval", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'length(s)':>9} | " + " | ".join(f"{m:>9}" for m in SAMPLING_MODES) + " | frames")
+    with tempfile.TemporaryDirectory() as tmp:
+        for loops in args.lengths:
+            video = looped_copy(args.video, loops, tmp)
+            info = probe_video(video)
+            timings, count = [], 0
+            for mode in SAMPLING_MODES:
+                start = time.perf_counter()
+                count = sum(1 for _ in iter_sampled_frames(video, args.interval, mode, info))
+                timings.append(time.perf_counter() - start)
+            print(f"{info['duration']:>9.0f} | " + " | ".join(f"{t:>8.2f}s" for t in timings) + f" | {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Per-frame post-processing cost of SSD-style detector outputs.
+
+Compares the old per-detection Python loop with the NumPy mask/bincount
+path in model.openvino_model. No model or video is needed; outputs are
+synthetic [1, 1, N, 7] arrays. Run from the backend folder:
+    python -m benchmarks.bench_ov_postprocess [--detections 200] [--frames 2000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from model.openvino_model import postprocess_detections
+
+
+def legacy_postprocess(result, counts):
+    # The loop detect_objects_in_video used to run for every frame
+    for det in result[0][0]:
+        conf = det[2]
+        if conf > 0.5:
+            label_id = int(det[1])
+            counts[label_id] = counts.get(label_id, 0) + 1
+
+
+def vectorized_postprocess(result, counts, nms_iou=None):
+    label_ids = postprocess_detections(result, 0.5, nms_iou)[:, 1].astype(np.intp)
+    if label_ids.size:
+        counts += np.bincount(label_ids, minlength=counts.size)
+
+
+def synthetic_outputs(frames, detections, labels, seed=0):
+    rng = np.random.default_rng(seed)
+    out = np.empty((frames, 1, 1, detections, 7), dtype=np.float32)
+    out[..., 0] = 0
+    out[..., 1] = rng.integers(0, labels, size=(frames, 1, 1, detections))
+    out[..., 2] = rng.random((frames, 1, 1, detections))
+    xy = rng.random((frames, 1, 1, detections, 2)) * 0.8
+    out[..., 3:5] = xy
+    out[..., 5:7] = xy + 0.05 + rng.random((frames, 1, 1, detections, 2)) * 0.15
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--detections", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--labels", type=int, default=91)
+    args = parser.parse_args()
+
+    outputs = synthetic_outputs(args.frames, args.detections, args.labels)
+
+    legacy_counts = {}
+    start = time.perf_counter()
+    for result in outputs:
+        legacy_postprocess(result, legacy_counts)
+    legacy = time.perf_counter() - start
+
+    counts = np.zeros(args.labels, dtype=np.int64)
+    start = time.perf_counter()
+    for result in outputs:
+        vectorized_postprocess(result, counts)
+    vectorized = time.perf_counter() - start
+    assert {i: int(counts[i]) for i in np.flatnonzero(counts)} == legacy_counts
+
+    counts[:] = 0
+    start = time.perf_counter()
+    for result in outputs:
+        vectorized_postprocess(result, counts, nms_iou=0.5)
+    with_nms = time.perf_counter() - start
+
+    per_frame = lambda t: t / args.frames * 1e6
+    print(f"{args.frames} frames x {args.detections} detections")
+    print(f"python loop      : {per_frame(legacy):8.1f} us/frame")
+    print(f"numpy mask+count : {per_frame(vectorized):8.1f} us/frame ({legacy / vectorized:.1f}x)")
+    print(f"numpy + NMS(0.5) : {per_frame(with_nms):8.1f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Transcript summarization: first-1000-characters vs map-reduce over the whole text.
+
+Run from the backend folder:
+    python -m benchmarks.bench_summarizer [transcript.txt] [--repeat 20] [--batch 1 4 8]
+
+Without a transcript file a synthetic meeting is generated; ``--repeat``
+concatenates the text to simulate a longer recording.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from transformers import pipeline
+
+import result_cache
+from model.summarizer import ChunkedSummarizer
+
+MODEL = "models/t5-small"
+
+
+def synthetic_transcript(sentences: int = 60) -> str:
+    topics = ["the budget", "hiring", "the product launch", "customer feedback", "the roadmap", "security"]
+    return " ".join(
+        f"In item {i} the team discussed {topics[i % len(topics)]} and agreed on next steps for week {i // 10 + 1}."
+        for i in range(sentences)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("transcript", nargs="?")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--chunk-tokens", type=int, default=400)
+    args = parser.parse_args()
+
+    text = Path(args.transcript).read_text(encoding="utf-8") if args.transcript else synthetic_transcript()
+    text = " ".join([text] * args.repeat)
+    pipe = pipeline("summarization", model=MODEL, tokenizer=MODEL)
+    total_tokens = len(pipe.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    start = time.perf_counter()
+    pipe(text[:1000], max_length=150, min_length=40, do_sample=False)
+    truncated = time.perf_counter() - start
+    print(f"{len(text)} chars / {total_tokens} tokens")
+    print(f"first 1000 chars : {truncated:.2f}s, covers {1000 / max(len(text), 1):.1%} of the transcript")
+
+    for batch in args.batch:
+        with tempfile.TemporaryDirectory() as tmp:
+            result_cache.CACHE_DIR = Path(tmp)  # cold: no memoized chunk summaries
+            summarizer = ChunkedSummarizer(pipe, MODEL, args.chunk_tokens, batch)
+            chunks = len(summarizer.split(text))
+            start = time.perf_counter()
+            summarizer.summarize(text)
+            cold = time.perf_counter() - start
+            start = time.perf_counter()
+            summarizer.summarize(text + " One more sentence was added at the end.")
+            grown = time.perf_counter() - start
+        print(f"map-reduce b={batch:<2}: {cold:.2f}s cold over {chunks} chunks, "
+              f"{grown:.2f}s after appending a sentence (memoized chunks reused)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Frames/sec of the DETR detector at different micro-batch sizes.
+
+Run from the backend folder:
+    python -m benchmarks.bench_vision_batch [video.mp4] [--frames 32]
+"""
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+from PIL import Image
+
+from agents.vision_agent import detect_batch, load_detector
+
+DEFAULT_VIDEO = Path(__file__).resolve().parents[2] / "sample_data" / "sample_pitch.mp4"
+
+
+def sample_frames(video_path, limit):
+    # Grab up to `limit` frames, one every 2 secs, like AnalyzeVideo does
+    cap = cv2.VideoCapture(str(video_path))
+    interval = (int(cap.get(cv2.CAP_PROP_FPS)) or 15) * 2
+    images, idx = [], 0
+    while len(images) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if idx % interval == 0:
+            images.append(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+        idx += 1
+    cap.release()
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("video", nargs="?", default=str(DEFAULT_VIDEO))
+    parser.add_argument("--frames", type=int, default=32)
+    args = parser.parse_args()
+
+    load_detector()
+    images = sample_frames(args.video, args.frames)
+    if not images:
+        raise SystemExit(f"No frames decoded from {args.video}")
+    while len(images) < args.frames:
+        images += images[: args.frames - len(images)]
+
+    detect_batch(images[:1])  # warm-up
+    print(f"{len(images)} frames from {args.video}")
+    print(f"{'batch':>5} | {'seconds':>8} | {'frames/sec':>10}")
+    for bs in (1, 4, 8, 16):
+        start = time.perf_counter()
+        for i in range(0, len(images), bs):
+            detect_batch(images[i:i + bs])
+        elapsed = time.perf_counter() - start
+        print(f"{bs:>5} | {elapsed:>8.2f} | {len(images) / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
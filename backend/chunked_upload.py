@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional
+
+import result_cache
+
+UPLOADS_DIR = result_cache.UPLOADS_DIR
+PARTIAL_DIR = result_cache.PARTIAL_DIR  # skipped by cache eviction
+COPY_CHUNK = 1024 * 1024
+# Partial uploads with no chunk for this long are deleted (checked when an upload starts)
+UPLOAD_PARTIAL_TTL_S = float(os.environ.get("UPLOAD_PARTIAL_TTL_S", "86400"))
+
+
+class UploadError(Exception):
+    def __init__(self, status_code: int, detail: str, **extra):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.extra = extra
+
+
+class UploadSession:
+    """One resumable upload: bytes are appended in order and hashed as they arrive."""
+
+    def __init__(self, upload_id: str, file_name: str, size: Optional[int]):
+        self.upload_id = upload_id
+        self.file_name = file_name
+        self.size = size
+        self.path = PARTIAL_DIR / f"{upload_id}.part"
+        self.hasher = hashlib.sha256()
+        self.offset = 0
+        self.lock = threading.Lock()
+
+    def status(self) -> Dict:
+        return {"upload_id": self.upload_id, "file_name": self.file_name, "offset": self.offset, "size": self.size}
+
+
+_sessions: Dict[str, UploadSession] = {}
+_sessions_lock = threading.Lock()
+_digest_index: Optional[Dict[str, str]] = None
+_index_lock = threading.Lock()
+
+
+def _meta_path(upload_id: str) -> Path:
+    return PARTIAL_DIR / f"{upload_id}.json"
+
+
+def find_by_digest(digest: str) -> Optional[str]:
+    """Name of an already stored upload with these exact bytes, if any."""
+    global _digest_index
+    with _index_lock:
+        if _digest_index is None:
+            _digest_index = {}
+            for sidecar in UPLOADS_DIR.glob("*.sha256"):
+                _digest_index[sidecar.read_text(encoding="utf-8").strip()] = sidecar.name[: -len(".sha256")]
+        name = _digest_index.get(digest)
+        if name and not (UPLOADS_DIR / name).exists():
+            del _digest_index[digest]  # evicted since
+            return None
+        return name
+
+
+def _remember(digest: str, file_name: str):
+    find_by_digest(digest)  # make sure the index is loaded
+    with _index_lock:
+        _digest_index[digest] = file_name
+
+
+def _store(tmp_path: Path, original_name: str, digest: str) -> Dict:
+    # Keep the first copy of any content; later identical uploads point at it
+    existing = find_by_digest(digest)
+    if existing:
+        tmp_path.unlink(missing_ok=True)
+        return {"file_name": existing, "saved_path": str(UPLOADS_DIR / existing),
+                "sha256": digest, "deduplicated": True}
+
+    unique_name = f"{uuid.uuid4().hex}_{original_name}"
+    path = UPLOADS_DIR / unique_name
+    os.replace(tmp_path, path)
+    result_cache.write_digest(path, digest)
+    _remember(digest, unique_name)
+    return {"file_name": unique_name, "saved_path": str(path), "sha256": digest, "deduplicated": False}
+
+
+def save_stream(src: BinaryIO, original_name: str) -> Dict:
+    """Single-shot upload: copy, hash and dedupe in one pass (call off the event loop)."""
+    PARTIAL_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = PARTIAL_DIR / f"{uuid.uuid4().hex}.part"
+    hasher = hashlib.sha256()
+    with open(tmp_path, "wb") as f:
+        for chunk in iter(lambda: src.read(COPY_CHUNK), b""):
+            hasher.update(chunk)
+            f.write(chunk)
+    return _store(tmp_path, original_name, hasher.hexdigest())
+
+
+def _expire_partials():
+    now = time.time()
+    with _sessions_lock:
+        active = set(_sessions)
+    for path in PARTIAL_DIR.iterdir():
+        upload_id = path.name.split(".", 1)[0]
+        try:
+            if upload_id not in active and now - path.stat().st_mtime > UPLOAD_PARTIAL_TTL_S:
+                path.unlink()
+        except OSError:
+            continue
+
+
+def init_upload(file_name: str, size: Optional[int] = None) -> Dict:
+    PARTIAL_DIR.mkdir(parents=True, exist_ok=True)
+    _expire_partials()
+    session = UploadSession(uuid.uuid4().hex, os.path.basename(file_name), size)
+    session.path.touch()
+    _meta_path(session.upload_id).write_text(json.dumps({"file_name": session.file_name, "size": size}),
+                                             encoding="utf-8")
+    with _sessions_lock:
+        _sessions[session.upload_id] = session
+    return session.status()
+
+
+def get_session(upload_id: str) -> UploadSession:
+    with _sessions_lock:
+        session = _sessions.get(upload_id)
+        if session is not None:
+            return session
+        # Resume after a gateway restart: rebuild offset and hash state from the partial file
+        meta = _meta_path(upload_id)
+        if not meta.exists() or not all(c in "0123456789abcdef" for c in upload_id):
+            raise UploadError(404, "Unknown upload id.")
+        info = json.loads(meta.read_text(encoding="utf-8"))
+        session = UploadSession(upload_id, info["file_name"], info.get("size"))
+        session.path.touch()  # a lost partial file restarts the upload from 0
+        with open(session.path, "rb") as f:
+            for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+                session.hasher.update(chunk)
+                session.offset += len(chunk)
+        _sessions[upload_id] = session
+        return session
+
+
+def _check_on_disk(session: UploadSession):
+    # The partial file must hold exactly the bytes hashed so far; if it was truncated or removed
+    # underneath us, forget the session so the next request rebuilds it from what is on disk
+    try:
+        size = session.path.stat().st_size
+    except OSError:
+        size = 0
+    else:
+        if size == session.offset:
+            return
+    with _sessions_lock:
+        _sessions.pop(session.upload_id, None)
+    raise UploadError(409, "Partial upload changed on disk; resume from the server offset.", offset=size)
+
+
+def write_chunk(upload_id: str, offset: int, data: bytes) -> Dict:
+    """Append ``data`` at ``offset``. Chunks must arrive in order; retransmits are ignored."""
+    session = get_session(upload_id)
+    with session.lock:
+        if offset + len(data) <= session.offset:
+            return session.status()  # already have these bytes
+        if offset != session.offset:
+            raise UploadError(409, "Offset mismatch; resume from the server offset.", offset=session.offset)
+        if session.size is not None and offset + len(data) > session.size:
+            raise UploadError(400, "Chunk runs past the declared size.", offset=session.offset)
+        _check_on_disk(session)
+        with open(session.path, "ab") as f:
+            f.write(data)
+        _meta_path(upload_id).touch()  # keeps an active upload from expiring
+        session.hasher.update(data)
+        session.offset += len(data)
+        return session.status()
+
+
+def finalize_upload(upload_id: str, sha256: Optional[str] = None) -> Dict:
+    session = get_session(upload_id)
+    with session.lock:
+        if session.size is not None and session.offset != session.size:
+            raise UploadError(409, "Upload incomplete.", offset=session.offset)
+        _check_on_disk(session)
+        digest = session.hasher.hexdigest()
+        if sha256 and sha256.lower() != digest:
+            raise UploadError(422, "Checksum mismatch.", sha256=digest)
+        result = _store(session.path, session.file_name, digest)
+        _meta_path(upload_id).unlink(missing_ok=True)
+    with _sessions_lock:
+        _sessions.pop(upload_id, None)
+    return result
@@ -0,0 +1,213 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import grpc
+from grpc_health.v1 import health_pb2, health_pb2_grpc
+
+from grpc_services import embedded, video_analysis_pb2_grpc
+from grpc_services.registry import AGENT_HEALTH_INTERVAL_S, AGENT_PORTS, AgentRegistry, Replica
+
+# "grpc": every agent is its own process, reached over its channel. "embedded": the agents'
+# servicers run inside the calling process and a call is a plain function call
+AGENT_TRANSPORT = os.environ.get("AGENT_TRANSPORT", "grpc")
+
+GRPC_MAX_MESSAGE_MB = int(os.environ.get("GRPC_MAX_MESSAGE_MB", "64"))
+# Idle connections are pinged so a dead agent is noticed before the next request hits it
+GRPC_KEEPALIVE_S = float(os.environ.get("GRPC_KEEPALIVE_S", "30"))
+GRPC_KEEPALIVE_TIMEOUT_S = float(os.environ.get("GRPC_KEEPALIVE_TIMEOUT_S", "10"))
+# Reconnect backoff after an agent restarts: start small, never wait longer than the cap
+GRPC_RECONNECT_BACKOFF_S = float(os.environ.get("GRPC_RECONNECT_BACKOFF_S", "0.5"))
+GRPC_MAX_RECONNECT_BACKOFF_S = float(os.environ.get("GRPC_MAX_RECONNECT_BACKOFF_S", "5"))
+
+# Per-RPC deadlines (seconds); long jobs get generous ones, the intent matcher a short one
+GRPC_DEADLINES = {
+    "transcription": float(os.environ.get("GRPC_DEADLINE_TRANSCRIPTION_S", "3600")),
+    "vision": float(os.environ.get("GRPC_DEADLINE_VISION_S", "3600")),
+    "generation": float(os.environ.get("GRPC_DEADLINE_GENERATION_S", "3600")),
+    "mcp": float(os.environ.get("GRPC_DEADLINE_MCP_S", "5")),
+}
+
+# Agent-side bound on RPCs running or queued for a worker thread; beyond it the
+# agent refuses at once with RESOURCE_EXHAUSTED instead of letting work pile up
+GRPC_MAX_CONCURRENT_RPCS = {
+    "transcription": int(os.environ.get("GRPC_MAX_CONCURRENT_RPCS_TRANSCRIPTION", "16")),
+    "vision": int(os.environ.get("GRPC_MAX_CONCURRENT_RPCS_VISION", "16")),
+    "generation": int(os.environ.get("GRPC_MAX_CONCURRENT_RPCS_GENERATION", "8")),
+    "mcp": int(os.environ.get("GRPC_MAX_CONCURRENT_RPCS_MCP", "64")),
+}
+
+
+def _ms(seconds: float) -> int:
+    return int(seconds * 1000)
+
+
+def channel_options():
+    max_bytes = GRPC_MAX_MESSAGE_MB * 1024 * 1024
+    return [
+        ("grpc.max_send_message_length", max_bytes),
+        ("grpc.max_receive_message_length", max_bytes),
+        ("grpc.keepalive_time_ms", _ms(GRPC_KEEPALIVE_S)),
+        ("grpc.keepalive_timeout_ms", _ms(GRPC_KEEPALIVE_TIMEOUT_S)),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+        ("grpc.initial_reconnect_backoff_ms", _ms(GRPC_RECONNECT_BACKOFF_S)),
+        ("grpc.min_reconnect_backoff_ms", _ms(GRPC_RECONNECT_BACKOFF_S)),
+        ("grpc.max_reconnect_backoff_ms", _ms(GRPC_MAX_RECONNECT_BACKOFF_S)),
+    ]
+
+
+def server_options():
+    # Agents must accept the clients' message size and keepalive pings on idle connections,
+    # or they answer the pings with GOAWAY (too_many_pings)
+    max_bytes = GRPC_MAX_MESSAGE_MB * 1024 * 1024
+    return [
+        ("grpc.max_send_message_length", max_bytes),
+        ("grpc.max_receive_message_length", max_bytes),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.min_ping_interval_without_data_ms", _ms(GRPC_KEEPALIVE_S) // 2),
+        ("grpc.http2.max_ping_strikes", 0),
+    ]
+
+
+def agent_registry(transport: str = AGENT_TRANSPORT) -> AgentRegistry:
+    # In-process agents have exactly one replica each
+    return AgentRegistry({name: ["embedded"] for name in AGENT_PORTS} if transport == "embedded" else None)
+
+
+class ChannelManager:
+    """One long-lived, multiplexed channel per agent replica.
+
+    Channels are opened on first use and shared by every request thread;
+    gRPC reconnects them on its own (with the backoff above) when an agent
+    restarts. Which replica serves a call is up to the ``AgentRegistry``:
+    wrap each call in ``call(name)`` so its outstanding count and failures
+    are tracked. ``close()`` shuts everything down.
+
+    With ``transport="embedded"`` each agent has a single in-process
+    replica and stubs call its servicer directly (``grpc_services.embedded``).
+    """
+
+    def __init__(self, registry: AgentRegistry = None, transport: str = AGENT_TRANSPORT):
+        if transport not in ("grpc", "embedded"):
+            raise ValueError(f"unknown agent transport {transport!r}")
+        self.transport = transport
+        self.registry = registry or agent_registry(transport)
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._stubs = {}
+        self._stop = threading.Event()
+
+    def channel(self, target: str) -> grpc.Channel:
+        with self._lock:
+            ch = self._channels.get(target)
+            if ch is None:
+                ch = self._channels[target] = self._open(target)
+            return ch
+
+    @property
+    def embedded(self) -> bool:
+        return self.transport == "embedded"
+
+    def _open(self, target: str):
+        return grpc.insecure_channel(target, options=channel_options())
+
+    def stub_for(self, replica: Replica) -> video_analysis_pb2_grpc.VideoAnalysisStub:
+        if self.embedded:
+            return embedded.runtime.stub(replica.agent)
+        stub = self._stubs.get(replica.target)
+        if stub is None:
+            stub = self._stubs[replica.target] = video_analysis_pb2_grpc.VideoAnalysisStub(self.channel(replica.target))
+        return stub
+
+    def acquire(self, name: str) -> Replica:
+        return self.registry.acquire(name)
+
+    def release(self, replica: Replica, error: BaseException = None):
+        self.registry.release(replica, error)
+
+    @contextmanager
+    def call(self, name: str):
+        """Yield the stub of the least loaded available replica of ``name`` for one call."""
+        replica = self.acquire(name)
+        error = None
+        try:
+            yield self.stub_for(replica)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.release(replica, error)
+
+    @staticmethod
+    def timeout(name: str) -> float:
+        return GRPC_DEADLINES[name]
+
+    def check_health(self, timeout: float = 1.0):
+        # Probe every replica and take those not SERVING out of rotation; the probe waits for the
+        # connection, so a restarted replica is seen as soon as it accepts one
+        for replica in self.registry.all():
+            try:
+                stub = (embedded.runtime.health_stub(replica.agent) if self.embedded
+                        else health_pb2_grpc.HealthStub(self.channel(replica.target)))
+                resp = stub.Check(health_pb2.HealthCheckRequest(service=""), timeout=timeout, wait_for_ready=True)
+                status = health_pb2.HealthCheckResponse.ServingStatus.Name(resp.status)
+            except grpc.RpcError as e:
+                status = self._probe_failure(replica, e)
+            self.registry.report_health(replica, status)
+
+    def _probe_failure(self, replica: Replica, e: grpc.RpcError) -> str:
+        if e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+            return "OVERLOADED"
+        # The probe queues behind the agent's worker threads like any RPC, so on a replica that
+        # is connected (or has our calls running) a timeout means busy, not down
+        if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED and (replica.outstanding or self._connected(replica)):
+            return "BUSY"
+        return "UNREACHABLE"
+
+    def _connected(self, replica: Replica) -> bool:
+        if self.embedded:
+            return True
+        try:
+            grpc.channel_ready_future(self.channel(replica.target)).result(timeout=0.1)
+            return True
+        except grpc.FutureTimeoutError:
+            return False
+
+    def start_health_checks(self, interval: float = AGENT_HEALTH_INTERVAL_S):
+        def loop():
+            while True:
+                self.check_health()
+                if self._stop.wait(interval):
+                    return
+        threading.Thread(target=loop, name="agent health checks", daemon=True).start()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            channels, self._channels, self._stubs = list(self._channels.values()), {}, {}
+        for ch in channels:
+            ch.close()
+
+
+class AioChannelManager(ChannelManager):
+    """The same pooled channels on ``grpc.aio``, for coroutines.
+
+    Create it inside the running event loop and ``await close()`` there.
+    Pass the blocking manager's registry so both dispatch on the same
+    outstanding counts; health checks run on the blocking manager.
+    """
+
+    def _open(self, target: str):
+        return grpc.aio.insecure_channel(target, options=channel_options())
+
+    def stub_for(self, replica: Replica):
+        if self.embedded:
+            return embedded.runtime.aio_stub(replica.agent)
+        return super().stub_for(replica)
+
+    async def close(self):
+        with self._lock:
+            channels, self._channels, self._stubs = list(self._channels.values()), {}, {}
+        for ch in channels:
+            await ch.close()
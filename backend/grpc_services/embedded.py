@@ -0,0 +1,285 @@
+import asyncio
+import importlib
+import os
+import threading
+import time
+from concurrent import futures
+from typing import Dict
+
+import grpc
+
+from grpc_services import video_analysis_pb2
+
+# agent name -> (module, servicer class); each module's ``readiness`` loads that agent's models
+SERVICERS = {
+    "transcription": ("agents.transcription_agent", "TranscriptionServicer"),
+    "vision": ("agents.vision_agent", "VisionServicer"),
+    "generation": ("agents.generation_agent", "GenerationServicer"),
+    "mcp": ("server.local_mcp_server", "MCPServicer"),
+}
+# Threads per agent for futures and grpc.aio-style callers (the agent servers use their own pools)
+EMBEDDED_MAX_WORKERS = int(os.environ.get("EMBEDDED_MAX_WORKERS", "8"))
+
+# method name -> True if the response is a stream
+_METHODS = {name: m.server_streaming
+            for name, m in video_analysis_pb2.DESCRIPTOR.services_by_name["VideoAnalysis"].methods_by_name.items()}
+_DONE = object()
+
+
+class EmbeddedRpcError(grpc.RpcError):
+    """What a servicer's ``context.abort`` (or an exception in it) looks like to an in-process caller."""
+
+    def __init__(self, code: grpc.StatusCode, details: str):
+        super().__init__(details)
+        self._code = code
+        self._details = details
+
+    def code(self) -> grpc.StatusCode:
+        return self._code
+
+    def details(self) -> str:
+        return self._details
+
+    def __str__(self):
+        return f"{self._code.name}: {self._details}"
+
+
+class EmbeddedContext:
+    """The parts of ``grpc.ServicerContext`` the servicers use."""
+
+    def __init__(self):
+        self._active = True
+        self._code = None
+        self._details = ""
+
+    def abort(self, code, details):
+        raise EmbeddedRpcError(code, details)
+
+    def set_code(self, code):
+        self._code = code
+
+    def set_details(self, details):
+        self._details = details
+
+    def is_active(self) -> bool:
+        return self._active
+
+    def cancel(self):
+        self._active = False
+
+    def check(self):
+        # A servicer that set a non-OK code and returned normally still failed the call
+        if self._code not in (None, grpc.StatusCode.OK):
+            raise EmbeddedRpcError(self._code, self._details)
+
+
+def _deadline_exceeded() -> EmbeddedRpcError:
+    return EmbeddedRpcError(grpc.StatusCode.DEADLINE_EXCEEDED, "Deadline Exceeded")
+
+
+def _invoke(method, request):
+    ctx = EmbeddedContext()
+    try:
+        response = method(request, ctx)
+    except grpc.RpcError:
+        raise
+    except Exception as e:
+        raise EmbeddedRpcError(grpc.StatusCode.UNKNOWN, f"Exception calling application: {e}") from e
+    ctx.check()
+    return response
+
+
+class _ResponseIterator:
+    # Server-streaming call; cancel() and the deadline take effect before the next response
+    def __init__(self, method, request, timeout=None):
+        self._ctx = EmbeddedContext()
+        self._gen = method(request, self._ctx)
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self._ctx.is_active():
+            self._gen.close()
+            raise StopIteration
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            self._ctx.cancel()
+            self._gen.close()
+            raise _deadline_exceeded()
+        try:
+            return next(self._gen)
+        except (StopIteration, grpc.RpcError):
+            raise
+        except Exception as e:
+            raise EmbeddedRpcError(grpc.StatusCode.UNKNOWN, f"Exception iterating responses: {e}") from e
+
+    def cancel(self):
+        self._ctx.cancel()
+
+
+def _settle(future: futures.Future, result=None, error: BaseException = None):
+    # First of the call and its deadline timer wins
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except futures.InvalidStateError:
+        pass
+
+
+class _Call:
+    def __init__(self, method, pool: futures.ThreadPoolExecutor, streaming: bool):
+        self._method = method
+        self._pool = pool
+        self._streaming = streaming
+
+    def __call__(self, request, timeout=None, **kwargs):
+        if self._streaming:
+            return _ResponseIterator(self._method, request, timeout)
+        if timeout is None:
+            return _invoke(self._method, request)
+        # A deadline needs the call off this thread; like gRPC, the servicer keeps running after it
+        try:
+            return self._pool.submit(_invoke, self._method, request).result(timeout)
+        except futures.TimeoutError:
+            raise _deadline_exceeded() from None
+
+    def future(self, request, timeout=None, **kwargs) -> futures.Future:
+        call = self._pool.submit(_invoke, self._method, request)
+        if timeout is None:
+            return call
+        # The returned future fails with DEADLINE_EXCEEDED if the call has not finished in time
+        result = futures.Future()
+        timer = threading.Timer(timeout, _settle, (result, None, _deadline_exceeded()))
+        timer.daemon = True
+
+        def finished(call):
+            timer.cancel()
+            if call.cancelled():
+                result.cancel()
+            elif call.exception() is not None:
+                _settle(result, None, call.exception())
+            else:
+                _settle(result, call.result())
+
+        timer.start()
+        call.add_done_callback(finished)
+        return result
+
+
+class _AioCall(_Call):
+    def __call__(self, request, timeout=None, **kwargs):
+        if self._streaming:
+            return self._stream(request, timeout)
+        return self._unary(request, timeout)
+
+    async def _unary(self, request, timeout):
+        call = asyncio.get_running_loop().run_in_executor(self._pool, _invoke, self._method, request)
+        try:
+            return await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            raise _deadline_exceeded() from None
+
+    async def _stream(self, request, timeout):
+        # The servicer's generator runs on a pool thread and hands each response to the event loop
+        loop = asyncio.get_running_loop()
+        responses = asyncio.Queue()
+        it = _ResponseIterator(self._method, request, timeout)
+
+        def put(item, error=None):
+            try:
+                loop.call_soon_threadsafe(responses.put_nowait, (item, error))
+            except RuntimeError:
+                it.cancel()  # the loop is gone
+
+        def produce():
+            try:
+                for item in it:
+                    put(item)
+            except BaseException as e:
+                put(_DONE, e)
+            else:
+                put(_DONE)
+
+        self._pool.submit(produce)
+        try:
+            while True:
+                item, error = await responses.get()
+                if item is _DONE:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            it.cancel()
+
+
+class EmbeddedStub:
+    """Same call surface as ``VideoAnalysisStub`` (plain, ``.future`` and
+    streaming calls), invoking ``servicer`` directly in this process."""
+
+    call_class = _Call
+
+    def __init__(self, servicer, pool: futures.ThreadPoolExecutor, methods: Dict[str, bool] = None):
+        for name, streaming in (methods or _METHODS).items():
+            setattr(self, name, self.call_class(getattr(servicer, name), pool, streaming))
+
+
+class AioEmbeddedStub(EmbeddedStub):
+    """The ``grpc.aio`` flavour: unary calls are awaitables, streams async iterators."""
+
+    call_class = _AioCall
+
+
+class EmbeddedRuntime:
+    """All agents' servicers inside the current process, sharing its loaded models.
+
+    An agent is imported on first use (or by ``start()``) and its models
+    load in the background, exactly as in a separate agent process; calls
+    that arrive first wait on its ``readiness``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents = {}
+        self._stubs = {}
+
+    def _agent(self, name: str):
+        with self._lock:
+            if name not in self._agents:
+                module_name, servicer_class = SERVICERS[name]
+                module = importlib.import_module(module_name)
+                pool = futures.ThreadPoolExecutor(EMBEDDED_MAX_WORKERS, thread_name_prefix=f"embedded-{name}")
+                self._agents[name] = (getattr(module, servicer_class)(), module.readiness, pool)
+                module.readiness.start()
+            return self._agents[name]
+
+    def start(self):
+        for name in SERVICERS:
+            self._agent(name)
+
+    def _stub(self, name: str, kind):
+        key = (name, kind)
+        stub = self._stubs.get(key)
+        if stub is None:
+            servicer, readiness, pool = self._agent(name)
+            if kind == "health":
+                stub = EmbeddedStub(readiness.health, pool, {"Check": False})
+            else:
+                stub = kind(servicer, pool)
+            self._stubs[key] = stub
+        return stub
+
+    def stub(self, name: str) -> EmbeddedStub:
+        return self._stub(name, EmbeddedStub)
+
+    def aio_stub(self, name: str) -> AioEmbeddedStub:
+        return self._stub(name, AioEmbeddedStub)
+
+    def health_stub(self, name: str) -> EmbeddedStub:
+        return self._stub(name, "health")
+
+
+runtime = EmbeddedRuntime()
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import grpc
+from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+
+SERVICE_NAME = "video_analysis.VideoAnalysis"
+
+
+class Readiness:
+    """Loads an agent's heavy libraries and models after its port is bound.
+
+    Progress is published through the standard gRPC health service: the
+    agent reports NOT_SERVING while ``loader`` runs and SERVING once it has
+    finished. Requests that arrive early wait for the load instead of failing.
+    """
+
+    def __init__(self, name: str, loader):
+        self.name = name
+        self._loader = loader
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._started = False
+        self.error = None
+        self.load_seconds = None
+        self.health = health.HealthServicer()
+        self._set(health_pb2.HealthCheckResponse.NOT_SERVING)
+
+    def _set(self, status):
+        for service in ("", SERVICE_NAME):
+            self.health.set(service, status)
+
+    def attach(self, server):
+        health_pb2_grpc.add_HealthServicer_to_server(self.health, server)
+
+    def start(self):
+        self._started = True
+        threading.Thread(target=self.load, name=f"{self.name} loader", daemon=True).start()
+
+    def load(self):
+        # Runs at most once, whichever of start() / require() gets here first
+        self._started = True
+        with self._lock:
+            if self._done.is_set():
+                return
+            start = time.perf_counter()
+            try:
+                self._loader()
+            except Exception as e:
+                self.error = e
+                print(f"{self.name}: loading failed: {e}")
+            else:
+                self.load_seconds = time.perf_counter() - start
+                print(f"{self.name}: models loaded in {self.load_seconds:.1f}s, now serving")
+                self._set(health_pb2.HealthCheckResponse.SERVING)
+            finally:
+                self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set() and self.error is None
+
+    def require(self, context=None, timeout: float = None):
+        """Block until loading has finished; abort the RPC with UNAVAILABLE if it failed.
+
+        Without a server that called ``start()`` (in-process use), the first caller loads inline.
+        """
+        if not self._started:
+            self.load()
+        if not self._done.wait(timeout):
+            message = f"{self.name} is still loading"
+        elif self.error is not None:
+            message = f"{self.name} failed to load: {self.error}"
+        else:
+            return
+        if context is None:
+            raise RuntimeError(message)
+        context.abort(grpc.StatusCode.UNAVAILABLE, message)
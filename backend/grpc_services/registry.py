@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import grpc
+
+AGENT_HOST = os.environ.get("AGENT_HOST", "localhost")
+AGENT_PORTS = {"transcription": 50051, "vision": 50052, "generation": 50053, "mcp": 50054}
+
+# Replicas per agent: {"vision": ["localhost:50052", "10.0.0.7:50052"], ...}; agents missing
+# from the file (or no file at all) keep the single default replica on AGENT_HOST
+AGENT_REGISTRY = os.environ.get("AGENT_REGISTRY", str(Path(__file__).resolve().parents[1] / "agent_registry.json"))
+# A replica whose call failed with UNAVAILABLE sits out this long, or until a health check passes
+AGENT_EJECT_S = float(os.environ.get("AGENT_EJECT_S", "10"))
+AGENT_HEALTH_INTERVAL_S = float(os.environ.get("AGENT_HEALTH_INTERVAL_S", "5"))
+# Health statuses that keep a replica in rotation
+UP_STATUSES = ("SERVING", "BUSY")
+
+
+def agent_port(name: str) -> int:
+    # Port an agent process binds; AGENT_PORT lets several replicas run side by side
+    return int(os.environ.get("AGENT_PORT", AGENT_PORTS[name]))
+
+
+def load_targets(path: str = AGENT_REGISTRY) -> Dict[str, List[str]]:
+    """Read the registry file; ``AGENT_REPLICAS_<AGENT>=host:port,...`` overrides it per agent."""
+    targets = {name: [f"{AGENT_HOST}:{port}"] for name, port in AGENT_PORTS.items()}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for name, replicas in json.load(f).items():
+                if name not in AGENT_PORTS:
+                    raise ValueError(f"{path}: unknown agent {name!r}")
+                if replicas:
+                    targets[name] = list(replicas)
+    for name in AGENT_PORTS:
+        override = os.environ.get(f"AGENT_REPLICAS_{name.upper()}")
+        if override:
+            targets[name] = [t.strip() for t in override.split(",") if t.strip()]
+    return targets
+
+
+class Replica:
+    def __init__(self, agent: str, target: str):
+        self.agent = agent
+        self.target = target
+        self.outstanding = 0
+        self.served = 0
+        self.failures = 0
+        self.status = "UNKNOWN"
+        self.healthy = True  # until a health check says otherwise
+        self.ejected_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+
+    def snapshot(self) -> dict:
+        return {
+            "target": self.target,
+            "status": self.status,
+            "available": self.available(time.monotonic()),
+            "outstanding": self.outstanding,
+            "served": self.served,
+            "failures": self.failures,
+        }
+
+
+class AgentRegistry:
+    """The replicas of every agent and which one gets the next call.
+
+    Dispatch is least-outstanding-requests over the available replicas
+    (ties rotate). A replica is taken out of rotation when a health check
+    reports neither SERVING nor BUSY (connected, but every worker thread
+    taken), or for ``AGENT_EJECT_S`` after a call to it
+    failed with UNAVAILABLE. If every replica is out, calls still go to one
+    (preferring those not recently failed) rather than failing without trying.
+    """
+
+    def __init__(self, targets: Optional[Dict[str, List[str]]] = None):
+        targets = targets or load_targets()
+        self.replicas = {name: [Replica(name, t) for t in ts] for name, ts in targets.items()}
+        self._lock = threading.Lock()
+        self._turn = 0
+
+    def all(self) -> List[Replica]:
+        return [r for replicas in self.replicas.values() for r in replicas]
+
+    def count(self, name: str) -> int:
+        return len(self.replicas[name])
+
+    def acquire(self, name: str) -> Replica:
+        with self._lock:
+            replicas = self.replicas[name]
+            now = time.monotonic()
+            candidates = [r for r in replicas if r.available(now)] or replicas
+            self._turn += 1
+            n = len(candidates)
+            replica = min((candidates[(self._turn + i) % n] for i in range(n)),
+                          key=lambda r: (r.ejected_until > now, r.outstanding))
+            replica.outstanding += 1
+            return replica
+
+    def release(self, replica: Replica, error: Optional[BaseException] = None):
+        with self._lock:
+            replica.outstanding -= 1
+            if error is None:
+                replica.served += 1
+            elif isinstance(error, grpc.RpcError) and error.code() == grpc.StatusCode.UNAVAILABLE:
+                replica.failures += 1
+                replica.ejected_until = time.monotonic() + AGENT_EJECT_S
+
+    def report_health(self, replica: Replica, status: str):
+        with self._lock:
+            replica.status = status
+            replica.healthy = status in UP_STATUSES
+            if replica.healthy:
+                replica.ejected_until = 0.0
+
+    def status(self) -> Dict[str, List[dict]]:
+        with self._lock:
+            return {name: [r.snapshot() for r in replicas] for name, replicas in self.replicas.items()}
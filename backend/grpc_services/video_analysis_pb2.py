@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\"grpc_services/video_analysis.proto\x12\x0evideo_analysis\"!\n\x0cVideoRequest\x12\x11\n\tfile_path\x18\x01 \x01(\t\"\"\n\x0cTextResponse\x12\x12\n\ntranscript\x18\x01 \x01(\t\"3\n\x10\x41nalysisResponse\x12\x0f\n\x07objects\x18\x01 \x03(\t\x12\x0e\n\x06graphs\x18\x02 \x03(\t\"7\n\rReportRequest\x12\x11\n\tfile_path\x18\x01 \x01(\t\x12\x13\n\x0breport_type\x18\x02 \x01(\t\"%\n\x0eReportResponse\x12\x13\n\x0breport_path\x18\x01 \x01(\t\"6\n\x14\x43larificationRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\x0f\n\x07options\x18\x02 \x03(\t\"R\n\x15\x43larificationResponse\x12\x17\n\x0fselected_option\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0f\n\x07options\x18\x03 \x03(\t\" \n\x0eHistoryRequest\x12\x0e\n\x06last_n\x18\x01 \x01(\x05\"#\n\x0fHistoryResponse\x12\x10\n\x08messages\x18\x01 \x03(\t2\xaf\x03\n\rVideoAnalysis\x12M\n\x0fTranscribeVideo\x12\x1c.video_analysis.VideoRequest\x1a\x1c.video_analysis.TextResponse\x12N\n\x0c\x41nalyzeVideo\x12\x1c.video_analysis.VideoRequest\x1a .video_analysis.AnalysisResponse\x12O\n\x0eGenerateReport\x12\x1d.video_analysis.ReportRequest\x1a\x1e.video_analysis.ReportResponse\x12[\n\x0c\x43larifyQuery\x12$.video_analysis.ClarificationRequest\x1a%.video_analysis.ClarificationResponse\x12Q\n\x0eGetChatHistory\x12\x1e.video_analysis.HistoryRequest\x1a\x1f.video_analysis.HistoryResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\"grpc_services/video_analysis.proto\x12\x0evideo_analysis\"P\n\x0cVideoRequest\x12\x11\n\tfile_path\x18\x01 \x01(\t\x12\x15\n\rsampling_mode\x18\x02 \x01(\t\x12\x16\n\x0e\x66rame_selector\x18\x03 \x01(\t\"\"\n\x0cTextResponse\x12\x12\n\ntranscript\x18\x01 \x01(\t\"L\n\x11TranscriptSegment\x12\r\n\x05index\x18\x01 \x01(\x05\x12\r\n\x05start\x18\x02 \x01(\x02\x12\x0b\n\x03\x65nd\x18\x03 \x01(\x02\x12\x0c\n\x04text\x18\x04 \x01(\t\"A\n\nAudioChunk\x12\x11\n\tfile_path\x18\x01 \x01(\t\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\x12\x0b\n\x03pcm\x18\x03 \x01(\x0c\"a\n\nVideoFrame\x12\x11\n\tfile_path\x18\x01 \x01(\t\x12\r\n\x05index\x18\x02 \x01(\x05\x12\x11\n\ttimestamp\x18\x03 \x01(\x02\x12\x0c\n\x04jpeg\x18\x04 \x01(\x0c\x12\x10\n\x08interval\x18\x05 \x01(\x02\"d\n\x10\x41nalysisResponse\x12\x0f\n\x07objects\x18\x01 \x03(\t\x12\x0e\n\x06graphs\x18\x02 \x03(\t\x12\x17\n\x0f\x66rames_analyzed\x18\x03 \x01(\x05\x12\x16\n\x0e\x66rames_skipped\x18\x04 \x01(\x05\"M\n\rReportRequest\x12\x11\n\tfile_path\x18\x01 \x01(\t\x12\x13\n\x0breport_type\x18\x02 \x01(\t\x12\x14\n\x0creport_types\x18\x03 \x03(\t\";\n\x0eReportResponse\x12\x13\n\x0breport_path\x18\x01 \x01(\t\x12\x14\n\x0creport_paths\x18\x02 \x03(\t\"6\n\x14\x43larificationRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\x0f\n\x07options\x18\x02 \x03(\t\"R\n\x15\x43larificationResponse\x12\x17\n\x0fselected_option\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0f\n\x07options\x18\x03 \x03(\t\" \n\x0eHistoryRequest\x12\x0e\n\x06last_n\x18\x01 \x01(\x05\"#\n\x0fHistoryResponse\x12\x10\n\x08messages\x18\x01 \x03(\t2\xab\x05\n\rVideoAnalysis\x12M\n\x0fTranscribeVideo\x12\x1c.video_analysis.VideoRequest\x1a\x1c.video_analysis.TextResponse\x12Z\n\x15StreamTranscribeVideo\x12\x1c.video_analysis.VideoRequest\x1a!.video_analysis.TranscriptSegment0\x01\x12N\n\x0c\x41nalyzeVideo\x12\x1c.video_analysis.VideoRequest\x1a .video_analysis.AnalysisResponse\x12M\n\x0fTranscribeAudio\x12\x1a.video_analysis.AudioChunk\x1a\x1c.video_analysis.TextResponse(\x01\x12O\n\rAnalyzeFrames\x12\x1a.video_analysis.VideoFrame\x1a .video_analysis.AnalysisResponse(\x01\x12O\n\x0eGenerateReport\x12\x1d.video_analysis.ReportRequest\x1a\x1e.video_analysis.ReportResponse\x12[\n\x0c\x43larifyQuery\x12$.video_analysis.ClarificationRequest\x1a%.video_analysis.ClarificationResponse\x12Q\n\x0eGetChatHistory\x12\x1e.video_analysis.HistoryRequest\x1a\x1f.video_analysis.HistoryResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,23 +32,29 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'grpc_services.video_analysi
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_VIDEOREQUEST']._serialized_start=54
-  _globals['_VIDEOREQUEST']._serialized_end=87
-  _globals['_TEXTRESPONSE']._serialized_start=89
-  _globals['_TEXTRESPONSE']._serialized_end=123
-  _globals['_ANALYSISRESPONSE']._serialized_start=125
-  _globals['_ANALYSISRESPONSE']._serialized_end=176
-  _globals['_REPORTREQUEST']._serialized_start=178
-  _globals['_REPORTREQUEST']._serialized_end=233
-  _globals['_REPORTRESPONSE']._serialized_start=235
-  _globals['_REPORTRESPONSE']._serialized_end=272
-  _globals['_CLARIFICATIONREQUEST']._serialized_start=274
-  _globals['_CLARIFICATIONREQUEST']._serialized_end=328
-  _globals['_CLARIFICATIONRESPONSE']._serialized_start=330
-  _globals['_CLARIFICATIONRESPONSE']._serialized_end=412
-  _globals['_HISTORYREQUEST']._serialized_start=414
-  _globals['_HISTORYREQUEST']._serialized_end=446
-  _globals['_HISTORYRESPONSE']._serialized_start=448
-  _globals['_HISTORYRESPONSE']._serialized_end=483
-  _globals['_VIDEOANALYSIS']._serialized_start=486
-  _globals['_VIDEOANALYSIS']._serialized_end=917
+  _globals['_VIDEOREQUEST']._serialized_end=134
+  _globals['_TEXTRESPONSE']._serialized_start=136
+  _globals['_TEXTRESPONSE']._serialized_end=170
+  _globals['_TRANSCRIPTSEGMENT']._serialized_start=172
+  _globals['_TRANSCRIPTSEGMENT']._serialized_end=248
+  _globals['_AUDIOCHUNK']._serialized_start=250
+  _globals['_AUDIOCHUNK']._serialized_end=315
+  _globals['_VIDEOFRAME']._serialized_start=317
+  _globals['_VIDEOFRAME']._serialized_end=414
+  _globals['_ANALYSISRESPONSE']._serialized_start=416
+  _globals['_ANALYSISRESPONSE']._serialized_end=516
+  _globals['_REPORTREQUEST']._serialized_start=518
+  _globals['_REPORTREQUEST']._serialized_end=595
+  _globals['_REPORTRESPONSE']._serialized_start=597
+  _globals['_REPORTRESPONSE']._serialized_end=656
+  _globals['_CLARIFICATIONREQUEST']._serialized_start=658
+  _globals['_CLARIFICATIONREQUEST']._serialized_end=712
+  _globals['_CLARIFICATIONRESPONSE']._serialized_start=714
+  _globals['_CLARIFICATIONRESPONSE']._serialized_end=796
+  _globals['_HISTORYREQUEST']._serialized_start=798
+  _globals['_HISTORYREQUEST']._serialized_end=830
+  _globals['_HISTORYRESPONSE']._serialized_start=832
+  _globals['_HISTORYRESPONSE']._serialized_end=867
+  _globals['_VIDEOANALYSIS']._serialized_start=870
+  _globals['_VIDEOANALYSIS']._serialized_end=1553
 # @@protoc_insertion_point(module_scope)
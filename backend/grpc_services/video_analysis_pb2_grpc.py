@@ -40,11 +40,26 @@ class VideoAnalysisStub(object):
                 request_serializer=grpc__services_dot_video__analysis__pb2.VideoRequest.SerializeToString,
                 response_deserializer=grpc__services_dot_video__analysis__pb2.TextResponse.FromString,
                 _registered_method=True)
+        self.StreamTranscribeVideo = channel.unary_stream(
+                '/video_analysis.VideoAnalysis/StreamTranscribeVideo',
+                request_serializer=grpc__services_dot_video__analysis__pb2.VideoRequest.SerializeToString,
+                response_deserializer=grpc__services_dot_video__analysis__pb2.TranscriptSegment.FromString,
+                _registered_method=True)
         self.AnalyzeVideo = channel.unary_unary(
                 '/video_analysis.VideoAnalysis/AnalyzeVideo',
                 request_serializer=grpc__services_dot_video__analysis__pb2.VideoRequest.SerializeToString,
                 response_deserializer=grpc__services_dot_video__analysis__pb2.AnalysisResponse.FromString,
                 _registered_method=True)
+        self.TranscribeAudio = channel.stream_unary(
+                '/video_analysis.VideoAnalysis/TranscribeAudio',
+                request_serializer=grpc__services_dot_video__analysis__pb2.AudioChunk.SerializeToString,
+                response_deserializer=grpc__services_dot_video__analysis__pb2.TextResponse.FromString,
+                _registered_method=True)
+        self.AnalyzeFrames = channel.stream_unary(
+                '/video_analysis.VideoAnalysis/AnalyzeFrames',
+                request_serializer=grpc__services_dot_video__analysis__pb2.VideoFrame.SerializeToString,
+                response_deserializer=grpc__services_dot_video__analysis__pb2.AnalysisResponse.FromString,
+                _registered_method=True)
         self.GenerateReport = channel.unary_unary(
                 '/video_analysis.VideoAnalysis/GenerateReport',
                 request_serializer=grpc__services_dot_video__analysis__pb2.ReportRequest.SerializeToString,
@@ -72,12 +87,30 @@ class VideoAnalysisServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamTranscribeVideo(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def AnalyzeVideo(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def TranscribeAudio(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AnalyzeFrames(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GenerateReport(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -104,11 +137,26 @@ def add_VideoAnalysisServicer_to_server(servicer, server):
                     request_deserializer=grpc__services_dot_video__analysis__pb2.VideoRequest.FromString,
                     response_serializer=grpc__services_dot_video__analysis__pb2.TextResponse.SerializeToString,
             ),
+            'StreamTranscribeVideo': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamTranscribeVideo,
+                    request_deserializer=grpc__services_dot_video__analysis__pb2.VideoRequest.FromString,
+                    response_serializer=grpc__services_dot_video__analysis__pb2.TranscriptSegment.SerializeToString,
+            ),
             'AnalyzeVideo': grpc.unary_unary_rpc_method_handler(
                     servicer.AnalyzeVideo,
                     request_deserializer=grpc__services_dot_video__analysis__pb2.VideoRequest.FromString,
                     response_serializer=grpc__services_dot_video__analysis__pb2.AnalysisResponse.SerializeToString,
             ),
+            'TranscribeAudio': grpc.stream_unary_rpc_method_handler(
+                    servicer.TranscribeAudio,
+                    request_deserializer=grpc__services_dot_video__analysis__pb2.AudioChunk.FromString,
+                    response_serializer=grpc__services_dot_video__analysis__pb2.TextResponse.SerializeToString,
+            ),
+            'AnalyzeFrames': grpc.stream_unary_rpc_method_handler(
+                    servicer.AnalyzeFrames,
+                    request_deserializer=grpc__services_dot_video__analysis__pb2.VideoFrame.FromString,
+                    response_serializer=grpc__services_dot_video__analysis__pb2.AnalysisResponse.SerializeToString,
+            ),
             'GenerateReport': grpc.unary_unary_rpc_method_handler(
                     servicer.GenerateReport,
                     request_deserializer=grpc__services_dot_video__analysis__pb2.ReportRequest.FromString,
@@ -163,6 +211,33 @@ class VideoAnalysis(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def StreamTranscribeVideo(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/video_analysis.VideoAnalysis/StreamTranscribeVideo',
+            grpc__services_dot_video__analysis__pb2.VideoRequest.SerializeToString,
+            grpc__services_dot_video__analysis__pb2.TranscriptSegment.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def AnalyzeVideo(request,
             target,
@@ -190,6 +265,60 @@ class VideoAnalysis(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def TranscribeAudio(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/video_analysis.VideoAnalysis/TranscribeAudio',
+            grpc__services_dot_video__analysis__pb2.AudioChunk.SerializeToString,
+            grpc__services_dot_video__analysis__pb2.TextResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AnalyzeFrames(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/video_analysis.VideoAnalysis/AnalyzeFrames',
+            grpc__services_dot_video__analysis__pb2.VideoFrame.SerializeToString,
+            grpc__services_dot_video__analysis__pb2.AnalysisResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GenerateReport(request,
             target,
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Finished jobs stay queryable for a while, then are dropped (oldest first beyond the cap)
+JOB_TTL_S = float(os.environ.get("JOB_TTL_S", "3600"))
+JOB_HISTORY = int(os.environ.get("JOB_HISTORY", "500"))
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+def describe_error(e: BaseException) -> str:
+    # gRPC errors carry a readable message in details(); everything else in str()
+    details = getattr(e, "details", None)
+    return details() if callable(details) else str(e)
+
+
+class Job:
+    """One long-running agent call, observable while it runs.
+
+    ``events`` is the append-only log of everything the job published
+    (status changes, partial results, the final result or error); streams
+    replay it from the start, so a late subscriber sees the whole history.
+    """
+
+    def __init__(self, operation: str, file_name: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.operation = operation
+        self.file_name = file_name
+        self.params = params
+        self.status = "queued"
+        self.progress: Dict[str, Any] = {}
+        self.events: List[Tuple[str, Any]] = []
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.exception: Optional[BaseException] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def publish(self, event: str, data: Any = None):
+        self.events.append((event, data))
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+
+    async def stream(self, start: int = 0):
+        """Yield ``(event, data)`` from ``start`` on, waiting for new ones until the job ends."""
+        i = start
+        while True:
+            wakeup = self._wakeup
+            while i < len(self.events):
+                yield self.events[i]
+                i += 1
+            if self.done:
+                return
+            await wakeup.wait()
+
+    async def wait(self) -> "Job":
+        # Shielded: a caller that goes away must not cancel a job others may share
+        await asyncio.shield(self._task)
+        return self
+
+    def snapshot(self) -> dict:
+        return {
+            "job_id": self.id,
+            "operation": self.operation,
+            "file_name": self.file_name,
+            "params": self.params,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    """Runs agent calls as asyncio tasks and coalesces identical in-flight jobs.
+
+    ``submit`` with the key of a job that is still running returns that job
+    instead of starting another; once it has finished, the same key starts
+    a fresh one (the agents' own result caches make that cheap).
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._inflight: Dict[Hashable, Job] = {}
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def recent(self, limit: int = 50) -> List[Job]:
+        return sorted(self._jobs.values(), key=lambda j: j.created, reverse=True)[:limit]
+
+    def submit(self, operation: str, file_name: str, params: Dict[str, Any],
+               run: Callable[[Job], Awaitable[Any]],
+               admit: Optional[Callable[[], None]] = None) -> Tuple[Job, bool]:
+        """Return ``(job, coalesced)``; ``run(job)`` produces the job's result.
+
+        ``admit`` is called only when a new job would start and may raise to refuse it.
+        """
+        key = (operation, file_name, tuple(sorted(params.items())))
+        job = self._inflight.get(key)
+        if job is not None:
+            return job, True
+        if admit is not None:
+            admit()
+        self._prune()
+        job = Job(operation, file_name, params)
+        self._jobs[job.id] = self._inflight[key] = job
+        job._task = asyncio.create_task(self._run(job, key, run))
+        return job, False
+
+    async def _run(self, job: Job, key: Hashable, run):
+        job.status = "running"
+        job.publish("status", {"status": job.status})
+        try:
+            job.result = await run(job)
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            job.publish("error", {"detail": "cancelled"})
+            raise
+        except Exception as e:
+            job.exception = e
+            job.error = describe_error(e)
+            job.status = "failed"
+            job.publish("error", {"detail": job.error})
+        else:
+            job.status = "done"
+            job.publish("done", job.result)
+        finally:
+            job.finished = time.time()
+            if self._inflight.get(key) is job:
+                del self._inflight[key]
+
+    def _prune(self):
+        now = time.time()
+        finished = sorted((j for j in self._jobs.values() if j.done), key=lambda j: j.finished)
+        excess = len(self._jobs) - JOB_HISTORY
+        for job in finished:
+            if now - job.finished > JOB_TTL_S or excess > 0:
+                del self._jobs[job.id]
+                excess -= 1
+
+    async def close(self):
+        # Gateway shutdown: cancel whatever is still running
+        tasks = [job._task for job in self._inflight.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
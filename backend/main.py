@@ -1,18 +1,65 @@
 import os
-import uuid
-import shutil
+import json
+import math
+import queue
+from contextlib import asynccontextmanager, nullcontext
+import cv2
 import grpc
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from storage import init_db, save_message, get_recent
-from grpc_services import video_analysis_pb2, video_analysis_pb2_grpc
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from storage import init_db, save_message, get_recent, history_writer
+import chunked_upload
+import result_cache
+from jobs import Job, JobQueue, describe_error
+from admission import AgentLimiter, Overloaded, build_limiters
+from model.shared_ingest import iter_media
+from grpc_services import embedded, video_analysis_pb2
+from grpc_services.channels import AioChannelManager, ChannelManager, agent_registry
+from grpc_services.registry import UP_STATUSES
 
 UPLOADS_DIR = "uploads"
 os.makedirs(UPLOADS_DIR, exist_ok=True)
+UPLOAD_MAX_CHUNK_MB = int(os.environ.get("UPLOAD_MAX_CHUNK_MB", "64"))
+
+# /analyze: one demux pass, audio and sampled frames streamed to both agents at once
+ANALYZE_FRAME_INTERVAL_S = float(os.environ.get("ANALYZE_FRAME_INTERVAL_S", "2"))
+ANALYZE_AUDIO_CHUNK_S = float(os.environ.get("ANALYZE_AUDIO_CHUNK_S", "30"))
+ANALYZE_QUEUE_SIZE = int(os.environ.get("ANALYZE_QUEUE_SIZE", "32"))
+ANALYZE_JPEG_QUALITY = int(os.environ.get("ANALYZE_JPEG_QUALITY", "90"))
+ASR_SAMPLE_RATE = 16000
 init_db()
 
-app = FastAPI(title="Video Analyzer API", description="Local AI Video Analyzer", version="1.0.0")
+# Long-lived gRPC channels to the agent replicas listed in the registry, opened at startup and
+# shared by all requests: blocking ones for the thread-bound handlers, grpc.aio ones for the agent jobs
+agents: ChannelManager = None
+aio_agents: AioChannelManager = None
+job_queue: JobQueue = None
+# Per-agent concurrency limit and bounded wait queue; excess requests get 429 at once
+limiters: dict = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global agents, aio_agents, job_queue, limiters
+    registry = agent_registry()
+    agents = ChannelManager(registry)
+    aio_agents = AioChannelManager(registry)
+    if agents.embedded:
+        # Load every agent's models in this process now rather than on the first call
+        embedded.runtime.start()
+    agents.start_health_checks()
+    job_queue = JobQueue()
+    limiters = build_limiters(registry)
+    yield
+    await job_queue.close()
+    await aio_agents.close()
+    agents.close()
+    history_writer.close()  # write whatever is still queued
+
+
+app = FastAPI(title="Video Analyzer API", description="Local AI Video Analyzer", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,90 +70,444 @@ app.add_middleware(
 )
 
 
-def _stub(port: int):
-    ch = grpc.insecure_channel(f"localhost:{port}")
-    return ch, video_analysis_pb2_grpc.VideoAnalysisStub(ch)
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, e: Overloaded):
+    return JSONResponse(status_code=429, content={"detail": str(e), "retry_after": e.retry_after},
+                        headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+
+def _raise_if_refused(agent: str, e: Exception):
+    # The agent's own bound (maximum_concurrent_rpcs) was hit: report it like the gateway's limit
+    if isinstance(e, grpc.RpcError) and e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+        raise Overloaded(agent, limiters[agent].retry_after()) from e
 
 
 # Upload
+def _saved(result: dict) -> dict:
+    path = os.path.join(UPLOADS_DIR, result["file_name"])
+    if result["deduplicated"]:
+        save_message("user", f"Uploaded video (already stored): {result['file_name']}")
+    else:
+        save_message("user", f"Uploaded video: {result['file_name']}")
+        save_message("system", f"Saved to path: {path}")
+    return {**result, "saved_path": path}
+
+
+def _upload_error(e: chunked_upload.UploadError):
+    return JSONResponse(status_code=e.status_code, content={"detail": e.detail, **e.extra})
+
+
 @app.post("/upload", tags=["Video"])
 async def upload_video(file: UploadFile = File(...)):
     if not file.filename.lower().endswith(".mp4"):
         raise HTTPException(status_code=400, detail="Only .mp4 allowed.")
 
-    unique_name = f"{uuid.uuid4().hex}_{file.filename}"
-    path = os.path.join(UPLOADS_DIR, unique_name)
+    # Copy and hash in one pass on a worker thread so the event loop stays free
+    result = await run_in_threadpool(chunked_upload.save_stream, file.file, file.filename)
+    return _saved(result)
 
-    with open(path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
 
-    save_message("user", f"Uploaded video: {unique_name}")
-    save_message("system", f"Saved to path: {path}")
-    return {"file_name": unique_name, "saved_path": path}
+# Resumable upload: init -> PUT chunks at increasing offsets -> finalize
+@app.post("/upload/init", tags=["Video"])
+async def upload_init(file_name: str, size: int = None):
+    if not file_name.lower().endswith(".mp4"):
+        raise HTTPException(status_code=400, detail="Only .mp4 allowed.")
+    return await run_in_threadpool(chunked_upload.init_upload, file_name, size)
 
 
-# Transcribe
-@app.post("/transcribe", tags=["Agents"])
-def transcribe_video(file_name: str):
+@app.get("/upload/{upload_id}", tags=["Video"])
+async def upload_status(upload_id: str):
+    try:
+        return await run_in_threadpool(lambda: chunked_upload.get_session(upload_id).status())
+    except chunked_upload.UploadError as e:
+        return _upload_error(e)
+
+
+@app.put("/upload/{upload_id}", tags=["Video"])
+async def upload_chunk(upload_id: str, offset: int, request: Request):
+    limit = UPLOAD_MAX_CHUNK_MB * 1024 * 1024
+    too_large = HTTPException(status_code=413, detail=f"Chunks are limited to {UPLOAD_MAX_CHUNK_MB} MB.")
+    # Refuse on the declared length before reading; count while reading for bodies without one
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > limit:
+        raise too_large
+    data = bytearray()
+    async for part in request.stream():
+        data += part
+        if len(data) > limit:
+            raise too_large
+    data = bytes(data)
+    try:
+        return await run_in_threadpool(chunked_upload.write_chunk, upload_id, offset, data)
+    except chunked_upload.UploadError as e:
+        return _upload_error(e)
+
+
+@app.post("/upload/{upload_id}/finalize", tags=["Video"])
+async def upload_finalize(upload_id: str, sha256: str = None):
+    try:
+        result = await run_in_threadpool(chunked_upload.finalize_upload, upload_id, sha256)
+    except chunked_upload.UploadError as e:
+        return _upload_error(e)
+    return _saved(result)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _video_path(file_name: str) -> str:
     path = os.path.join(UPLOADS_DIR, file_name)
     if not os.path.exists(path):
         raise HTTPException(status_code=404, detail="File not found.")
+    return path
 
-    save_message("user", f"Transcribing {file_name}")
+
+def _failover(agent: str, e: Exception, attempt: int) -> bool:
+    # UNAVAILABLE: the replica refused the connection or is not loaded, so the call never ran there
+    return (isinstance(e, grpc.RpcError) and e.code() == grpc.StatusCode.UNAVAILABLE
+            and attempt + 1 < aio_agents.registry.count(agent))
+
+
+async def _call_agent(agent: str, method: str, request):
+    # Unary call on the least loaded replica, moving on to the next one if it is unavailable
+    attempt = 0
+    while True:
+        try:
+            with aio_agents.call(agent) as stub:
+                return await getattr(stub, method)(request, timeout=aio_agents.timeout(agent))
+        except grpc.RpcError as e:
+            if not _failover(agent, e, attempt):
+                raise
+            attempt += 1
+
+
+# Agent jobs: the long gRPC calls run as coroutines on grpc.aio, so waiting on one holds no thread
+async def _transcribe_job(job: Job, path: str):
+    texts = []
+    attempt = 0
     try:
-        ch, stub = _stub(50051)
-        resp = stub.TranscribeVideo(video_analysis_pb2.VideoRequest(file_path=path))
-        ch.close()
-        transcript = getattr(resp, "transcript", str(resp))
-        save_message("assistant", transcript[:500] + "...")
-        return {"transcript": transcript}
+        while True:
+            try:
+                with aio_agents.call("transcription") as stub:
+                    stream = stub.StreamTranscribeVideo(
+                        video_analysis_pb2.VideoRequest(file_path=path), timeout=aio_agents.timeout("transcription"))
+                    async for seg in stream:
+                        texts.append(seg.text)
+                        job.progress = {"segments": len(texts), "position_s": round(seg.end, 2)}
+                        job.publish("segment", {"index": seg.index, "start": round(seg.start, 2),
+                                                "end": round(seg.end, 2), "text": seg.text})
+                break
+            except grpc.RpcError as e:
+                if not texts and e.code() == grpc.StatusCode.FAILED_PRECONDITION:
+                    # No local ASR on the agent: the unary RPC still answers with its fallback text
+                    resp = await _call_agent("transcription", "TranscribeVideo",
+                                             video_analysis_pb2.VideoRequest(file_path=path))
+                    texts.append(resp.transcript)
+                    job.publish("segment", {"index": 0, "start": 0.0, "end": 0.0, "text": resp.transcript})
+                    break
+                # Only a stream that has not produced anything yet can move to another replica
+                if texts or not _failover("transcription", e, attempt):
+                    raise
+                attempt += 1
     except Exception as e:
-        save_message("system", f"Transcription failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        save_message("system", f"Transcription failed: {describe_error(e)}")
+        raise
+    transcript = " ".join(texts)
+    save_message("assistant", transcript[:500] + "...")
+    return {"transcript": transcript}
+
+
+async def _detect_job(job: Job, path: str, sampling_mode: str = "", frame_selector: str = ""):
+    req = video_analysis_pb2.VideoRequest(
+        file_path=path, sampling_mode=sampling_mode, frame_selector=frame_selector
+    )
+    try:
+        resp = await _call_agent("vision", "AnalyzeVideo", req)
+    except Exception as e:
+        save_message("system", f"Vision agent failed: {describe_error(e)}")
+        raise
+    objs = list(resp.objects)
+    save_message("assistant", f"Objects detected: {objs}" if objs else "No objects detected.")
+    return {
+        "objects": objs,
+        "frames_analyzed": resp.frames_analyzed,
+        "frames_skipped": resp.frames_skipped,
+    }
+
+
+async def _report_job(job: Job, path: str, report_type: str = "pdf"):
+    # "both" renders every format from one shared analysis pass
+    report_types = ["pdf", "pptx"] if report_type == "both" else [report_type]
+    req = video_analysis_pb2.ReportRequest(file_path=path, report_type=report_types[0], report_types=report_types)
+    try:
+        resp = await _call_agent("generation", "GenerateReport", req)
+    except Exception as e:
+        save_message("system", f"Report generation failed: {describe_error(e)}")
+        raise
+    report_paths = list(resp.report_paths) or [resp.report_path]
+    for report_path in report_paths:
+        save_message("assistant", f"Report generated: {report_path}")
+    return {"report_path": report_paths[0], "report_paths": report_paths}
+
+
+JOB_RUNNERS = {"transcribe": _transcribe_job, "detect": _detect_job, "generate": _report_job}
+JOB_AGENTS = {"transcribe": "transcription", "detect": "vision", "generate": "generation"}
+
+
+async def _run_admitted(limiter: AgentLimiter, call, pin: str = None):
+    # Called right after reserve(): slot() gives the reservation back however the call ends,
+    # so anything that can fail (like pinning ``pin`` against eviction) happens inside it
+    async with limiter.slot():
+        with result_cache.pinned(pin) if pin else nullcontext():
+            try:
+                return await call()
+            except Exception as e:
+                _raise_if_refused(limiter.name, e)
+                raise
+
+
+def _submit(operation: str, file_name: str, **params):
+    # Identical in-flight jobs (same operation, file and options) are shared, not started twice;
+    # a new job must first get past the agent's limit and wait queue
+    path = _video_path(file_name)
+    limiter = limiters[JOB_AGENTS[operation]]
+
+    # The upload and its derived files stay on disk until the job is over
+    return job_queue.submit(operation, file_name, params,
+                            lambda job: _run_admitted(limiter, lambda: JOB_RUNNERS[operation](job, path, **params),
+                                                      pin=path),
+                            admit=limiter.reserve)
+
+
+def _check_report_type(report_type: str):
+    if report_type not in ("pdf", "pptx", "both"):
+        raise HTTPException(status_code=400, detail="Only PDF, PPTX or both allowed.")
+
+
+async def _result(job: Job):
+    await job.wait()
+    if isinstance(job.exception, Overloaded):
+        raise job.exception
+    if job.error is not None:
+        raise HTTPException(status_code=500, detail=job.error)
+    return job.result
+
+
+async def _job_events(job: Job, since: int = 0, only=None):
+    async for event, data in job.stream(since):
+        if only is None or event in only:
+            yield _sse(event, data)
+
+
+# Transcribe
+@app.post("/transcribe", tags=["Agents"])
+async def transcribe_video(file_name: str, stream: bool = False):
+    job, _ = _submit("transcribe", file_name)
+    save_message("user", f"Transcribing {file_name}")
+    if stream:
+        # Each segment is relayed as a server-sent event while the job runs; the job's status
+        # events are left out so the stream keeps its segment / done / error contract
+        return StreamingResponse(_job_events(job, only=("segment", "done", "error")),
+                                 media_type="text/event-stream")
+    return await _result(job)
 
 
 # Detect objects
 @app.post("/detect", tags=["Agents"], summary="Detect Video")
-def analyze_video(file_name: str):
-    path = os.path.join(UPLOADS_DIR, file_name)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="File not found.")
-
+async def analyze_video(file_name: str, sampling_mode: str = "", frame_selector: str = ""):
+    job, _ = _submit("detect", file_name, sampling_mode=sampling_mode, frame_selector=frame_selector)
     save_message("user", f"Detecting {file_name}")
-    try:
-        ch, stub = _stub(50052)
-        resp = stub.AnalyzeVideo(video_analysis_pb2.VideoRequest(file_path=path))
-        ch.close()
-        objs = list(getattr(resp, "objects", []))
-        summary = f"Objects detected: {objs}" if objs else "No objects detected."
-        save_message("assistant", summary)
-        return {"objects": objs}
-    except Exception as e:
-        save_message("system", f"Vision agent failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _result(job)
 
 
 # Generate reports
 @app.post("/generate", tags=["Agents"])
-def generate_report(file_name: str, report_type: str = "pdf"):
-    path = os.path.join(UPLOADS_DIR, file_name)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="File not found.")
-    if report_type not in ("pdf", "pptx"):
-        raise HTTPException(status_code=400, detail="Only PDF or PPTX allowed.")
+async def generate_report(file_name: str, report_type: str = "pdf"):
+    _check_report_type(report_type)
+    job, _ = _submit("generate", file_name, report_type=report_type)
+    save_message("user", f"Generating {report_type.upper()} for {file_name}")
+    return await _result(job)
 
+
+# Jobs: submit returns at once with a job id; poll it or follow its events
+@app.post("/jobs/transcribe", tags=["Jobs"], status_code=202)
+async def submit_transcription(file_name: str):
+    job, coalesced = _submit("transcribe", file_name)
+    save_message("user", f"Transcribing {file_name}")
+    return {**job.snapshot(), "coalesced": coalesced}
+
+
+@app.post("/jobs/detect", tags=["Jobs"], status_code=202)
+async def submit_detection(file_name: str, sampling_mode: str = "", frame_selector: str = ""):
+    job, coalesced = _submit("detect", file_name, sampling_mode=sampling_mode, frame_selector=frame_selector)
+    save_message("user", f"Detecting {file_name}")
+    return {**job.snapshot(), "coalesced": coalesced}
+
+
+@app.post("/jobs/generate", tags=["Jobs"], status_code=202)
+async def submit_report(file_name: str, report_type: str = "pdf"):
+    _check_report_type(report_type)
+    job, coalesced = _submit("generate", file_name, report_type=report_type)
     save_message("user", f"Generating {report_type.upper()} for {file_name}")
+    return {**job.snapshot(), "coalesced": coalesced}
+
+
+@app.get("/jobs", tags=["Jobs"])
+async def list_jobs(limit: int = 50):
+    return {"jobs": [job.snapshot() for job in job_queue.recent(limit)]}
+
+
+def _job(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+@app.get("/jobs/{job_id}", tags=["Jobs"])
+async def job_status(job_id: str):
+    return _job(job_id).snapshot()
+
+
+@app.get("/jobs/{job_id}/events", tags=["Jobs"])
+async def job_events(job_id: str, since: int = 0):
+    # Server-sent events: the job's history from ``since`` on, then live updates until it ends
+    return StreamingResponse(_job_events(_job(job_id), since), media_type="text/event-stream")
+
+
+# Analyze: transcript + objects from a single demux
+_END = object()
+
+
+def _drain(q: queue.Queue):
+    # Request iterator for a client-streaming call
+    while True:
+        item = q.get()
+        if item is _END:
+            return
+        yield item
+
+
+def _feed(q: queue.Queue, item, call):
+    while not call.done():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+    # The agent already answered (e.g. from its cache): never block, just wake its request thread
     try:
-        ch, stub = _stub(50053)
-        req = video_analysis_pb2.ReportRequest(file_path=path, report_type=report_type)
-        resp = stub.GenerateReport(req)
-        ch.close()
-        report_path = getattr(resp, "report_path", "")
-        save_message("assistant", f"Report generated: {report_path}")
-        return {"report_path": report_path}
+        q.put_nowait(item)
+    except queue.Full:
+        pass
+
+
+def _call_error(call):
+    return call.exception() if call.done() and not call.cancelled() else None
+
+
+def _analyze_shared(path: str):
+    """Demux ``path`` once and run transcription and detection on its streams concurrently."""
+    audio_q, frame_q = queue.Queue(ANALYZE_QUEUE_SIZE), queue.Queue(ANALYZE_QUEUE_SIZE)
+    # The first message tells each agent where to write its results
+    audio_q.put(video_analysis_pb2.AudioChunk(file_path=path, sample_rate=ASR_SAMPLE_RATE))
+    frame_q.put(video_analysis_pb2.VideoFrame(file_path=path, interval=ANALYZE_FRAME_INTERVAL_S))
+
+    # Each replica is charged with its own call's outcome
+    asr_replica, vis_replica = agents.acquire("transcription"), agents.acquire("vision")
+    asr_call = agents.stub_for(asr_replica).TranscribeAudio.future(_drain(audio_q), timeout=agents.timeout("transcription"))
+    vis_call = agents.stub_for(vis_replica).AnalyzeFrames.future(_drain(frame_q), timeout=agents.timeout("vision"))
+    try:
+        try:
+            for kind, payload in iter_media(path, ASR_SAMPLE_RATE, ANALYZE_FRAME_INTERVAL_S, ANALYZE_AUDIO_CHUNK_S):
+                if kind == "audio":
+                    _feed(audio_q, video_analysis_pb2.AudioChunk(pcm=payload.tobytes()), asr_call)
+                else:
+                    frame_idx, ts, frame = payload
+                    ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, ANALYZE_JPEG_QUALITY])
+                    if ok:
+                        msg = video_analysis_pb2.VideoFrame(index=frame_idx, timestamp=ts, jpeg=jpeg.tobytes())
+                        _feed(frame_q, msg, vis_call)
+                if asr_call.done() and vis_call.done():
+                    break  # both answered from cache; no need to decode the rest
+        except Exception:
+            asr_call.cancel()
+            vis_call.cancel()
+            raise
+        finally:
+            _feed(audio_q, _END, asr_call)
+            _feed(frame_q, _END, vis_call)
+        return asr_call.result(), vis_call.result()
+    finally:
+        agents.release(asr_replica, _call_error(asr_call))
+        agents.release(vis_replica, _call_error(vis_call))
+
+
+@app.post("/analyze", tags=["Agents"])
+async def analyze_shared(file_name: str):
+    path = _video_path(file_name)
+    # Both agents must admit the request before the demux starts
+    asr, vision = limiters["transcription"], limiters["vision"]
+    asr.reserve()
+    try:
+        vision.reserve()
+    except Overloaded:
+        asr.unreserve()
+        raise
+
+    vision_entered = False
+    try:
+        async with asr.slot():
+            async with vision.slot():
+                vision_entered = True
+                save_message("user", f"Analyzing {file_name}")
+                with result_cache.pinned(path):
+                    # The demux loop is blocking; it holds a worker thread only once admitted
+                    text, resp = await run_in_threadpool(_analyze_shared, path)
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+            raise Overloaded("transcription or vision", max(asr.retry_after(), vision.retry_after())) from e
+        save_message("system", f"Analysis failed: {e.details()}")
+        raise HTTPException(status_code=500, detail=e.details())
     except Exception as e:
-        save_message("system", f"Report generation failed: {e}")
+        save_message("system", f"Analysis failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if not vision_entered:
+            vision.unreserve()  # e.g. cancelled while waiting for the transcription slot
+
+    objs = list(resp.objects)
+    save_message("assistant", text.transcript[:500] + "...")
+    save_message("assistant", f"Objects detected: {objs}" if objs else "No objects detected.")
+    return {
+        "transcript": text.transcript,
+        "objects": objs,
+        "frames_analyzed": resp.frames_analyzed,
+        "frames_skipped": resp.frames_skipped,
+    }
+
+
+# Agent readiness (gRPC health: NOT_SERVING while models load, SERVING after; BUSY when every
+# worker thread is taken), per replica; an agent counts as SERVING while one of its replicas is up
+@app.get("/health", tags=["Functions"])
+def agents_health():
+    agents.check_health()
+    replicas = agents.registry.status()
+    statuses = {}
+    for name, states in replicas.items():
+        serving = [r for r in states if r["status"] in UP_STATUSES]
+        statuses[name] = "SERVING" if serving else states[0]["status"]
+    return {"ready": all(status == "SERVING" for status in statuses.values()), "agents": statuses, "replicas": replicas}
+
+
+# Admission queues: what each agent is running, what is waiting, and the measured service time
+@app.get("/queues", tags=["Functions"])
+async def queue_status():
+    return {
+        "agents": {name: limiter.status() for name, limiter in limiters.items()},
+        "jobs_in_flight": job_queue.in_flight,
+    }
 
 
 # Get history
@@ -136,22 +537,21 @@ def download_file(filename: str):
 
 # Clarify (route to MCP gRPC)
 @app.post("/clarify", tags=["Functions"])
-def clarify_query(query: str):
-    import grpc
-    from grpc_services import video_analysis_pb2, video_analysis_pb2_grpc
+async def clarify_query(query: str):
     from storage import save_message
 
     q = query.lower().strip()
-    save_message("user", query)
-
+    limiters["mcp"].reserve()
     try:
-        # Connect to MCP Server (Intent Matcher)
-        channel = grpc.insecure_channel("localhost:50054")
-        stub = video_analysis_pb2_grpc.VideoAnalysisStub(channel)
+        save_message("user", query)
+    except Exception:
+        limiters["mcp"].unreserve()  # slot() was never entered to give it back
+        raise
 
-        # Send the query to the MCP Server with timeout (5 seconds)
-        resp = stub.ClarifyQuery(video_analysis_pb2.ClarificationRequest(query=q), timeout=5)
-        channel.close()
+    try:
+        # Send the query to the MCP Server (Intent Matcher) over the shared channel, with its deadline
+        resp = await _run_admitted(limiters["mcp"], lambda: _call_agent(
+            "mcp", "ClarifyQuery", video_analysis_pb2.ClarificationRequest(query=q)))
 
         # DEBUG: log the raw response object and attributes so we can see exactly what arrived
         print("[API Clarify] raw resp:", repr(resp))
@@ -189,6 +589,8 @@ def clarify_query(query: str):
             "options": options
         }
 
+    except Overloaded:
+        raise
     except Exception as e:
         print(f"[API Clarify Error] {e}")
         save_message("assistant", "Did you want me to transcribe, detect objects, or generate a report?")
@@ -0,0 +1,126 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+
+class DetectionStore:
+    """Column-oriented record of every detection in a video.
+
+    One row per detection: frame_idx, timestamp, label_id, score and
+    bbox (xmin, ymin, xmax, ymax). ``frame_times`` holds the timestamp of
+    every analyzed frame, so timelines can tell "absent" from "not looked
+    at". Saved as a single ``.npz``; queries are NumPy masks, so changing
+    the confidence threshold never needs another DETR pass.
+    """
+
+    def __init__(self, frame_idx, timestamp, label_id, score, bbox, labels,
+                 frame_times, frames_skipped: int = 0):
+        self.frame_idx = np.asarray(frame_idx, dtype=np.int32)
+        self.timestamp = np.asarray(timestamp, dtype=np.float32)
+        self.label_id = np.asarray(label_id, dtype=np.int16)
+        self.score = np.asarray(score, dtype=np.float32)
+        self.bbox = np.asarray(bbox, dtype=np.float32).reshape(-1, 4)
+        self.labels = np.asarray(labels, dtype=str)
+        self.frame_times = np.sort(np.asarray(frame_times, dtype=np.float32))
+        self.frames_skipped = int(frames_skipped)
+
+    def __len__(self):
+        return len(self.score)
+
+    @property
+    def frames_analyzed(self) -> int:
+        return len(self.frame_times)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, float, str, float, Tuple[float, float, float, float]]],
+                  frame_times, frames_skipped: int = 0) -> "DetectionStore":
+        rows = list(rows)
+        if not rows:
+            return cls([], [], [], [], np.empty((0, 4)), [], frame_times, frames_skipped)
+        frame_idx, timestamp, names, score, bbox = zip(*rows)
+        labels, label_id = np.unique(np.asarray(names, dtype=str), return_inverse=True)
+        return cls(frame_idx, timestamp, label_id, score, bbox, labels, frame_times, frames_skipped)
+
+    @classmethod
+    def concat(cls, stores: List["DetectionStore"]) -> "DetectionStore":
+        # Merge shards, remapping each shard's label ids onto a shared vocabulary
+        stores = list(stores)
+        labels = np.unique(np.concatenate([s.labels for s in stores])) if stores else np.array([], dtype=str)
+        label_id = [np.searchsorted(labels, s.labels)[s.label_id] if len(s) else s.label_id for s in stores]
+        merged = cls(
+            np.concatenate([s.frame_idx for s in stores]) if stores else [],
+            np.concatenate([s.timestamp for s in stores]) if stores else [],
+            np.concatenate(label_id) if stores else [],
+            np.concatenate([s.score for s in stores]) if stores else [],
+            np.concatenate([s.bbox for s in stores]) if stores else np.empty((0, 4)),
+            labels,
+            np.concatenate([s.frame_times for s in stores]) if stores else [],
+            sum(s.frames_skipped for s in stores),
+        )
+        return merged.sorted()
+
+    def sorted(self) -> "DetectionStore":
+        order = np.argsort(self.frame_idx, kind="stable")
+        return self._take(order)
+
+    def _take(self, rows) -> "DetectionStore":
+        return DetectionStore(self.frame_idx[rows], self.timestamp[rows], self.label_id[rows],
+                              self.score[rows], self.bbox[rows], self.labels,
+                              self.frame_times, self.frames_skipped)
+
+    # Persistence
+    def save(self, path) -> Path:
+        path = Path(path)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f, frame_idx=self.frame_idx, timestamp=self.timestamp, label_id=self.label_id,
+                score=self.score, bbox=self.bbox, labels=self.labels,
+                frame_times=self.frame_times, frames_skipped=np.int32(self.frames_skipped),
+            )
+        return path
+
+    @classmethod
+    def load(cls, path) -> "DetectionStore":
+        with np.load(str(path), allow_pickle=False) as z:
+            return cls(z["frame_idx"], z["timestamp"], z["label_id"], z["score"], z["bbox"],
+                       z["labels"], z["frame_times"], int(z["frames_skipped"]))
+
+    # Queries
+    def threshold(self, min_score: float) -> "DetectionStore":
+        return self._take(np.flatnonzero(self.score >= min_score))
+
+    def label_counts(self, min_score: float = 0.5) -> Dict[str, int]:
+        ids = self.label_id[self.score >= min_score]
+        counts = np.bincount(ids, minlength=len(self.labels)) if len(ids) else np.zeros(len(self.labels), int)
+        return {str(self.labels[i]): int(counts[i]) for i in np.flatnonzero(counts)}
+
+    def timeline(self, label: str, min_score: float = 0.5) -> List[Tuple[float, float]]:
+        """(start, end) seconds of consecutive analyzed frames where ``label`` shows up."""
+        hits = np.flatnonzero(self.labels == label)
+        if not len(hits) or not len(self.frame_times):
+            return []
+        mask = (self.label_id == hits[0]) & (self.score >= min_score)
+        present = np.isin(self.frame_times, self.timestamp[mask])
+        edges = np.diff(np.concatenate(([0], present.astype(np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+        return [(float(self.frame_times[a]), float(self.frame_times[b])) for a, b in zip(starts, ends)]
+
+    def timelines(self, min_score: float = 0.5) -> Dict[str, List[Tuple[float, float]]]:
+        return {label: self.timeline(label, min_score) for label in self.label_counts(min_score)}
+
+
+def format_span(start: float, end: float) -> str:
+    def mmss(t):
+        return f"{int(t) // 60}:{int(t) % 60:02d}"
+    return mmss(start) if end - start < 1 else f"{mmss(start)}-{mmss(end)}"
+
+
+def load_store(path) -> Optional[DetectionStore]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        return DetectionStore.load(path)
+    except Exception as e:
+        print(f"[DetectionStore] Could not read {path}: {e}")
+        return None
@@ -0,0 +1,127 @@
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
+import cv2
+import imageio_ffmpeg as iio_ffmpeg
+
+
+# Sampling modes, from most exact to fastest on long videos:
+#   accurate - decode and convert every frame, keep every Nth (original behaviour)
+#   grab     - decode every frame but only retrieve/convert the sampled ones
+#   seek     - jump to each sampled frame (keyframe seek + short decode)
+#   ffmpeg   - let ffmpeg's select filter pick the same frames and pipe raw BGR out
+SAMPLING_MODES = ("accurate", "grab", "seek", "ffmpeg")
+
+
+def probe_video(video_path) -> Optional[Dict]:
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    info = {
+        "fps": fps,
+        "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    }
+    info["duration"] = info["frame_count"] / fps if fps else 0.0
+    cap.release()
+    return info
+
+
+def frame_step(fps: float, interval_s: float) -> int:
+    # Same rounding as the original `frame_rate * 2` loop
+    return max(1, int((int(fps) or 15) * interval_s))
+
+
+def split_frame_range(frame_count: int, step: int, parts: int):
+    # Split [0, frame_count) into `parts` ranges whose edges sit on the sampling grid
+    parts = max(1, min(parts, -(-frame_count // step) if frame_count > 0 else 1))
+    edges = [int(round(frame_count * k / parts / step)) * step for k in range(parts)] + [frame_count]
+    return [(a, b) for a, b in zip(edges, edges[1:]) if b > a]
+
+
+def iter_sampled_frames(video_path, interval_s: float = 2.0, mode: str = "grab",
+                        info: Optional[Dict] = None, start_frame: int = 0,
+                        end_frame: Optional[int] = None) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """Yield (frame_idx, timestamp_s, bgr_frame) for one frame every ``interval_s``.
+
+    ``start_frame``/``end_frame`` restrict sampling to a half-open range;
+    sampled indices stay on the same grid as a full pass.
+    """
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode: {mode}")
+    info = info or probe_video(video_path)
+    if info is None:
+        return
+    fps = info["fps"] or 15
+    step = frame_step(info["fps"], interval_s)
+    first = -(-max(start_frame, 0) // step) * step  # round up onto the sampling grid
+    if end_frame is None:
+        end_frame = info["frame_count"] if info["frame_count"] > 0 else float("inf")
+
+    if mode == "ffmpeg":
+        yield from _iter_ffmpeg(video_path, step, fps, info, first, end_frame)
+        return
+
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        if mode == "seek":
+            target = first
+            while target < max(end_frame, 1):
+                if target:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield target, target / fps, frame
+                target += step
+            return
+
+        frame_idx = first
+        if first:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+        while frame_idx < end_frame:
+            if mode == "accurate":
+                ret, frame = cap.read()
+            else:
+                ret = cap.grab()
+                frame = None
+            if not ret:
+                break
+            if frame_idx % step == 0:
+                if frame is None:
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        break
+                yield frame_idx, frame_idx / fps, frame
+            frame_idx += 1
+    finally:
+        cap.release()
+
+
+def _iter_ffmpeg(video_path, step: int, fps: float, info: Dict, first: int, end_frame):
+    # select keeps every step-th decoded frame counted from ``first`` (on the grid), i.e. the
+    # same frames as the OpenCV modes, including the last one; output is raw bgr24
+    width, height = info["width"], info["height"]
+    start_s = first / fps
+    input_params = ["-ss", f"{start_s:.6f}"] if first else []
+    output_params = ["-vf", f"select=not(mod(n\\,{step}))", "-fps_mode", "passthrough"]
+    if end_frame != float("inf"):
+        output_params += ["-t", f"{max(end_frame - first, 0) / fps:.6f}"]
+    reader = iio_ffmpeg.read_frames(
+        str(video_path),
+        pix_fmt="bgr24",
+        input_params=input_params,
+        output_params=output_params,
+    )
+    try:
+        meta = next(reader)
+        width, height = meta.get("size") or (width, height)
+        for k, raw in enumerate(reader):
+            frame_idx = first + k * step
+            if frame_idx >= end_frame:
+                break
+            frame = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 3)
+            yield frame_idx, frame_idx / fps, frame
+    finally:
+        reader.close()
@@ -1,5 +1,7 @@
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import queue
+import threading
 import numpy as np
 import cv2
 import imageio_ffmpeg as iio_ffmpeg
@@ -7,21 +9,51 @@ import subprocess
 
 
 try:
-    from openvino.runtime import Core
+    from openvino.runtime import AsyncInferQueue, Core
 except Exception as e:
     raise ImportError("OpenVINO runtime not found. Install openvino-dev[onnx] or openvino. Error: " + str(e))
 
 
+# Compiled blobs are cached here so agent restarts skip recompilation
+OV_CACHE_DIR = Path(__file__).resolve().parents[1] / "models" / "ov_cache"
+
+_core = None
+_compiled_models = {}
+_registry_lock = threading.Lock()
+
+
+def get_core() -> Core:
+    global _core
+    with _registry_lock:
+        if _core is None:
+            OV_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            _core = Core()
+            _core.set_property({"CACHE_DIR": str(OV_CACHE_DIR)})
+        return _core
+
+
+def get_compiled_model(model_path: str, device: str = "CPU", hint: str = "THROUGHPUT"):
+    """Process-wide compiled model, keyed by (path, device, performance hint)."""
+    model_path = str(Path(model_path).resolve())
+    key = (model_path, device, hint)
+    compiled = _compiled_models.get(key)
+    if compiled is not None:
+        return compiled
+    if not Path(model_path).exists():
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    core = get_core()
+    with _registry_lock:
+        if key not in _compiled_models:
+            _compiled_models[key] = core.compile_model(model_path, device, {"PERFORMANCE_HINT": hint})
+        return _compiled_models[key]
+
+
 class OVModel:
-    def __init__(self, model_path: str, device: str = "CPU"):
-        model_path = str(model_path)
-        if not Path(model_path).exists():
-            raise FileNotFoundError(f"Model file not found: {model_path}")
-        self.core = Core()
-        self.model = self.core.read_model(model_path)
-        self.input_map = {i.get_any_name(): i for i in self.model.inputs}
-        self.output_map = {o.get_any_name(): o for o in self.model.outputs}
-        self.compiled = self.core.compile_model(self.model, device)
+    def __init__(self, model_path: str, device: str = "CPU", hint: str = "LATENCY"):
+        self.core = get_core()
+        self.compiled = get_compiled_model(model_path, device, hint)
+        self.input_map = {i.get_any_name(): i for i in self.compiled.inputs}
+        self.output_map = {o.get_any_name(): o for o in self.compiled.outputs}
         self.req = self.compiled.create_infer_request()
 
     def input_info(self) -> Dict[str, Dict]:
@@ -34,32 +66,148 @@ class OVModel:
         return self.req.infer(inputs)
 
 
-def detect_objects_in_video(model_path: str, video_path: str, device: str = "CPU"):
-    if not Path(model_path).exists():
-        raise FileNotFoundError(f"Model file not found: {model_path}")
+def nms_per_class(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Indices kept by greedy NMS, run independently per class.
+
+    Boxes of different classes are shifted apart so one vectorized pass
+    never suppresses across classes.
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.intp)
+    order = np.argsort(-scores, kind="stable")
+    shifted = (boxes + (classes * (boxes.max() + 1))[:, None])[order]
+    x1, y1, x2, y2 = shifted.T
+    areas = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    # Pairwise IoU in one shot, then a cheap greedy pass over the rows
+    w = np.clip(np.minimum(x2[:, None], x2) - np.maximum(x1[:, None], x1), 0, None)
+    h = np.clip(np.minimum(y2[:, None], y2) - np.maximum(y1[:, None], y1), 0, None)
+    inter = w * h
+    iou = inter / np.maximum(areas[:, None] + areas - inter, 1e-12)
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(order[i])
+        suppressed |= iou[i] > iou_threshold
+    return np.asarray(keep, dtype=np.intp)
+
+
+def postprocess_detections(raw: np.ndarray, min_score: float = 0.5, nms_iou: Optional[float] = None) -> np.ndarray:
+    """Confident rows of an SSD-style [1, 1, N, 7] output, as an (M, 7) array.
+
+    Columns: image_id, label, conf, xmin, ymin, xmax, ymax. Filtering is a
+    boolean mask; ``nms_iou`` optionally applies per-class NMS.
+    """
+    dets = raw.reshape(-1, 7)
+    dets = dets[(dets[:, 0] >= 0) & (dets[:, 2] > min_score)]
+    if nms_iou is not None and len(dets) > 1:
+        dets = dets[nms_per_class(dets[:, 3:7], dets[:, 2], dets[:, 1].astype(np.int64), nms_iou)]
+    return dets
+
+
+class AsyncDetector:
+    """Streaming SSD-style detector that keeps several infer requests in flight.
+
+    Frames are preprocessed to the model's NCHW input and submitted to an
+    ``AsyncInferQueue``; ``jobs=0`` lets OpenVINO pick the optimal number
+    of requests for the device. Results come back with the caller's key.
+    """
+
+    def __init__(self, model_path: str, device: str = "CPU", jobs: int = 0,
+                 labels: Optional[List[str]] = None):
+        self.compiled = get_compiled_model(model_path, device, "THROUGHPUT")
+        self.output_layer = self.compiled.outputs[0]
+        _, _, self.height, self.width = (int(d) for d in self.compiled.inputs[0].shape)
+        self.labels = labels or []
+        self._queue = AsyncInferQueue(self.compiled, jobs)
+        self._queue.set_callback(self._on_done)
+        self._done = []
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+
+    @property
+    def jobs(self) -> int:
+        return len(self._queue)
+
+    def preprocess(self, frame_bgr: np.ndarray) -> np.ndarray:
+        resized = cv2.resize(frame_bgr, (self.width, self.height))
+        return resized.transpose(2, 0, 1)[None, ...]  # NCHW
 
-    core = Core()
-    model = core.read_model(model_path)
-    compiled_model = core.compile_model(model, device)
-    output_layer = compiled_model.outputs[0]
+    def _on_done(self, request, key):
+        output = request.get_output_tensor(0).data.copy()
+        with self._lock:
+            self._done.append((key, output))
+
+    def _pop_done(self):
+        with self._lock:
+            done, self._done = self._done, []
+        return done
+
+    def stream(self, items: Iterable[Tuple[object, np.ndarray]]):
+        """Submit (key, NCHW tensor) pairs; yield (key, raw_output) as they finish.
+
+        ``start_async`` blocks while every request is busy, which bounds the
+        number of frames in flight.
+        """
+        with self._submit_lock:
+            for key, tensor in items:
+                self._queue.start_async({0: tensor}, userdata=key)
+                yield from self._pop_done()
+            self._queue.wait_all()
+            yield from self._pop_done()
+
+    def infer_many(self, items: Iterable[Tuple[object, np.ndarray]]) -> List[Tuple[object, np.ndarray]]:
+        return list(self.stream(items))
+
+    def parse(self, raw: np.ndarray, image_size: Tuple[int, int], min_score: float = 0.5,
+              nms_iou: Optional[float] = None) -> List[Dict]:
+        # Coordinates come back normalized; scale them to the source frame
+        w, h = image_size
+        dets = postprocess_detections(raw, min_score, nms_iou)
+        boxes = dets[:, 3:7] * np.array([w, h, w, h], dtype=np.float32)
+        results = []
+        for label_id, score, box in zip(dets[:, 1].astype(np.int64), dets[:, 2], boxes.tolist()):
+            label = self.labels[label_id] if label_id < len(self.labels) else str(label_id)
+            results.append({
+                "label": label,
+                "score": float(score),
+                "box": {"xmin": box[0], "ymin": box[1], "xmax": box[2], "ymax": box[3]},
+            })
+        return results
+
+
+def load_labels(path) -> List[str]:
+    path = Path(path) if path else None
+    if path is None or not path.exists():
+        return []
+    return [line.strip() for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def detect_objects_in_video(model_path: str, video_path: str, device: str = "CPU",
+                            min_score: float = 0.5, nms_iou: Optional[float] = None):
+    ov = AsyncDetector(model_path, device)
 
     cap = cv2.VideoCapture(str(video_path))
-    counts = {}
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frame_resized = cv2.resize(frame, (544, 320))
-        input_data = frame_resized.transpose(2, 0, 1)[None, ...]  # NCHW
-        result = compiled_model([input_data])[output_layer]
-        for det in result[0][0]:
-            conf = det[2]
-            if conf > 0.5:
-                label_id = int(det[1])
-                counts[label_id] = counts.get(label_id, 0) + 1
+    # Per-label totals live in a preallocated array, grown only for unseen label ids
+    counts = np.zeros(max(len(ov.labels), 256), dtype=np.int64)
+
+    def frames():
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield None, ov.preprocess(frame)
+
+    for _, result in ov.stream(frames()):
+        label_ids = postprocess_detections(result, min_score, nms_iou)[:, 1].astype(np.intp)
+        if not label_ids.size:
+            continue
+        if label_ids.max() >= counts.size:
+            counts = np.pad(counts, (0, int(label_ids.max()) + 1 - counts.size))
+        counts += np.bincount(label_ids, minlength=counts.size)
     cap.release()
-    return {"object_counts": counts}
+    return {"object_counts": {int(i): int(counts[i]) for i in np.flatnonzero(counts)}}
 
 
 def extract_audio_to_wav(video_path: str, out_wav_path: str = None, sample_rate: int = 16000):
@@ -78,3 +226,69 @@ def extract_audio_to_wav(video_path: str, out_wav_path: str = None, sample_rate:
     subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     return out_wav_path
 
+
+def iter_audio_pcm(video_path: str, sample_rate: int = 16000, chunk_seconds: float = 30.0,
+                   prefetch: int = 4) -> Iterator[np.ndarray]:
+    """Yield mono float32 PCM chunks piped from ffmpeg's stdout (no file on disk).
+
+    A reader thread keeps up to ``prefetch`` chunks decoded ahead, so
+    extraction carries on while the caller is busy transcribing.
+    """
+    ffmpeg_exe = iio_ffmpeg.get_ffmpeg_exe()
+    cmd = [
+        ffmpeg_exe, "-nostdin", "-i", str(video_path),
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1"
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    chunk_bytes = max(2, int(sample_rate * chunk_seconds) * 2)
+    chunks = queue.Queue(maxsize=max(1, prefetch))
+    stop = threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                buf = proc.stdout.read(chunk_bytes)
+                if not buf:
+                    break
+                pcm = np.frombuffer(buf[: len(buf) // 2 * 2], dtype=np.int16)
+                while not stop.is_set():
+                    try:
+                        chunks.put(pcm.astype(np.float32) / 32768.0, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        finally:
+            while True:
+                try:
+                    chunks.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    if stop.is_set():
+                        break
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    produced = False
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            produced = True
+            yield chunk
+        if proc.wait() != 0 and not produced:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+    finally:
+        stop.set()
+        if proc.poll() is None:
+            proc.kill()
+        thread.join(timeout=1)
+        proc.stdout.close()
+        proc.wait()
+
+
+def extract_audio_to_array(video_path: str, sample_rate: int = 16000) -> np.ndarray:
+    # Whole track as one float32 buffer, ready for faster-whisper
+    chunks = list(iter_audio_pcm(video_path, sample_rate))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
@@ -0,0 +1,61 @@
+from typing import Optional
+import numpy as np
+import cv2
+
+
+def frame_signature(frame: np.ndarray):
+    # Cheap per-frame signals: 64-bit dHash and a 16-bin luma histogram
+    small = cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    hash_src = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    dhash = hash_src[:, 1:] > hash_src[:, :-1]
+    hist = np.bincount((gray >> 4).ravel(), minlength=16).astype(np.float32)
+    return dhash.ravel(), hist / hist.sum()
+
+
+def hamming(a: np.ndarray, b: np.ndarray) -> int:
+    return int(np.count_nonzero(a != b))
+
+
+def hist_delta(a: np.ndarray, b: np.ndarray) -> float:
+    # Total variation distance, 0 (identical) .. 1 (disjoint)
+    return float(np.abs(a - b).sum() / 2)
+
+
+class SceneChangeFilter:
+    """Keeps only frames that differ from the last kept frame.
+
+    Candidates are expected every ``candidate_interval`` seconds (the
+    max frames-per-minute budget). A frame is kept when its dHash or
+    histogram moved past the threshold, or when ``min_fpm`` forces one.
+    """
+
+    def __init__(self, min_fpm: float = 2, max_fpm: float = 30,
+                 hash_threshold: int = 10, hist_threshold: float = 0.25):
+        self.min_gap = 60.0 / min_fpm if min_fpm > 0 else float("inf")
+        self.candidate_interval = 60.0 / max(max_fpm, 1e-6)
+        self.hash_threshold = hash_threshold
+        self.hist_threshold = hist_threshold
+        self.kept = 0
+        self.skipped = 0
+        self._last_ts: Optional[float] = None
+        self._last_sig = None
+
+    def accept(self, timestamp: float, frame: np.ndarray) -> bool:
+        sig = frame_signature(frame)
+        if self._last_sig is None:
+            keep = True
+        elif timestamp - self._last_ts < self.candidate_interval * 0.999:
+            keep = False
+        else:
+            changed = (hamming(sig[0], self._last_sig[0]) >= self.hash_threshold
+                       or hist_delta(sig[1], self._last_sig[1]) >= self.hist_threshold)
+            keep = changed or timestamp - self._last_ts >= self.min_gap
+
+        if keep:
+            self.kept += 1
+            self._last_ts = timestamp
+            self._last_sig = sig
+        else:
+            self.skipped += 1
+        return keep
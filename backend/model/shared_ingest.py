@@ -0,0 +1,61 @@
+from typing import Iterator, Tuple
+import numpy as np
+import av
+
+from model.frame_sampler import frame_step
+
+
+def iter_media(video_path, sample_rate: int = 16000, interval_s: float = 2.0,
+               audio_chunk_s: float = 30.0) -> Iterator[Tuple[str, object]]:
+    """Demux and decode a video once, yielding both of its streams in container order.
+
+    Events are ``("audio", pcm)`` with mono int16 PCM at ``sample_rate`` in
+    chunks of ``audio_chunk_s`` seconds, and ``("frame", (frame_idx, timestamp_s, bgr))``
+    for one frame every ``interval_s`` on the same grid as ``iter_sampled_frames``.
+    Only sampled frames are converted to arrays; the rest are decoded and dropped.
+    """
+    with av.open(str(video_path)) as container:
+        streams = []
+        video = container.streams.video[0] if container.streams.video else None
+        audio = container.streams.audio[0] if container.streams.audio else None
+        if video is not None:
+            video.thread_type = "AUTO"
+            fps = float(video.average_rate or 0)
+            step = frame_step(fps, interval_s)
+            fps = fps or 15
+            streams.append(video)
+        if audio is not None:
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+            streams.append(audio)
+        if not streams:
+            return
+
+        chunk_len = max(1, int(sample_rate * audio_chunk_s))
+        pending, buffered = [], 0
+        frame_idx = 0
+        for packet in container.demux(*streams):
+            if packet.stream is video:
+                for frame in packet.decode():
+                    if frame_idx % step == 0:
+                        yield "frame", (frame_idx, frame_idx / fps, frame.to_ndarray(format="bgr24"))
+                    frame_idx += 1
+            else:
+                for frame in packet.decode():
+                    for out in resampler.resample(frame):
+                        pcm = out.to_ndarray().reshape(-1)
+                        pending.append(pcm)
+                        buffered += len(pcm)
+                    if buffered >= chunk_len:
+                        joined = np.concatenate(pending)
+                        for start in range(0, len(joined) - chunk_len + 1, chunk_len):
+                            yield "audio", joined[start:start + chunk_len]
+                        rest = joined[len(joined) // chunk_len * chunk_len:]
+                        pending, buffered = [rest], len(rest)
+
+        if audio is not None:
+            for out in resampler.resample(None):
+                pending.append(out.to_ndarray().reshape(-1))
+            if pending:
+                tail = np.concatenate(pending)
+                if len(tail):
+                    yield "audio", tail
@@ -0,0 +1,144 @@
+import queue
+import threading
+import time
+from typing import Callable, Iterable, List, Tuple
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0      # time spent doing the stage's own work
+        self.starved = 0.0   # time waiting for input
+        self.blocked = 0.0   # time waiting for room downstream (backpressure)
+
+    def summary(self, wall: float) -> str:
+        wall = wall or 1e-9
+        return (f"{self.name}: {self.items} items, busy {self.busy / wall:.0%}, "
+                f"starved {self.starved / wall:.0%}, blocked {self.blocked / wall:.0%}")
+
+
+class StagedPipeline:
+    """Runs a source iterator and a chain of stages on their own threads.
+
+    Stages are connected by bounded queues, so a slow consumer throttles
+    the decoder instead of letting frames pile up in memory. A stage
+    function returns the item for the next stage, or None to drop it.
+    The caller is the final stage and pulls results with ``get()``.
+    """
+
+    DONE = object()
+
+    def __init__(self, source: Iterable, stages: List[Tuple[str, Callable]],
+                 queue_size: int = 4, source_name: str = "decode", sink_name: str = "infer"):
+        self._source = source
+        self._stages = stages
+        self._queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in range(len(stages) + 1)]
+        self._stop = threading.Event()
+        self._error = None
+        self._threads = []
+        self.stats = [StageStats(source_name)] + [StageStats(n) for n, _ in stages] + [StageStats(sink_name)]
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._threads = [threading.Thread(target=self._run_source, daemon=True)]
+        for i, (_, fn) in enumerate(self._stages):
+            self._threads.append(threading.Thread(target=self._run_stage, args=(i, fn), daemon=True))
+        for t in self._threads:
+            t.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        for q in self._queues:
+            # Drain so blocked producers notice the stop flag
+            while not q.empty():
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+        for t in self._threads:
+            t.join(timeout=5)
+        return False
+
+    def _put(self, idx: int, item, stats: StageStats) -> bool:
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self._queues[idx].put(item, timeout=0.1)
+                stats.blocked += time.perf_counter() - start
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fail(self, exc: BaseException, idx: int):
+        self._error = exc
+        self._put(idx, self.DONE, StageStats("error"))
+
+    def _run_source(self):
+        stats = self.stats[0]
+        it = iter(self._source)
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                stats.busy += time.perf_counter() - start
+                stats.items += 1
+                if not self._put(0, item, stats):
+                    return
+            self._put(0, self.DONE, stats)
+        except BaseException as e:
+            self._fail(e, 0)
+        finally:
+            close = getattr(it, "close", None)
+            if close:
+                close()
+
+    def _run_stage(self, i: int, fn: Callable):
+        stats = self.stats[i + 1]
+        inbox = self._queues[i]
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                try:
+                    item = inbox.get(timeout=0.1)
+                except queue.Empty:
+                    stats.starved += time.perf_counter() - start
+                    continue
+                stats.starved += time.perf_counter() - start
+                if item is self.DONE:
+                    self._put(i + 1, self.DONE, stats)
+                    return
+                start = time.perf_counter()
+                out = fn(item)
+                stats.busy += time.perf_counter() - start
+                stats.items += 1
+                if out is not None and not self._put(i + 1, out, stats):
+                    return
+        except BaseException as e:
+            self._fail(e, i + 1)
+
+    def get(self, timeout: float = None):
+        """Next result, DONE at the end, or queue.Empty after ``timeout``."""
+        sink = self.stats[-1]
+        start = time.perf_counter()
+        try:
+            item = self._queues[-1].get(timeout=timeout)
+        finally:
+            sink.starved += time.perf_counter() - start
+        if item is self.DONE and self._error is not None:
+            raise self._error
+        if item is not self.DONE:
+            sink.items += 1
+        return item
+
+    def report(self) -> str:
+        wall = time.perf_counter() - self._started
+        sink = self.stats[-1]
+        sink.busy = max(0.0, wall - sink.starved)
+        return f"{wall:.2f}s wall | " + " | ".join(s.summary(wall) for s in self.stats)
@@ -0,0 +1,99 @@
+import hashlib
+import re
+from typing import List
+
+import result_cache
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ChunkedSummarizer:
+    """Map-reduce summarization over a whole transcript with a short-context model.
+
+    The text is packed into chunks of at most ``chunk_tokens`` tokens on
+    sentence boundaries; chunks are summarized in batched pipeline calls and
+    their summaries concatenated and summarized again until a single chunk
+    remains. Every chunk summary is memoized by content hash, so re-running
+    on a grown or repeated transcript only pays for the new chunks.
+    """
+
+    def __init__(self, pipe, model_name: str, chunk_tokens: int = 400, batch_size: int = 4,
+                 max_length: int = 150, min_length: int = 40,
+                 map_max_length: int = 120, map_min_length: int = 20):
+        self.pipe = pipe
+        self.tokenizer = pipe.tokenizer
+        self.model_name = model_name
+        # Each level must shrink the text, or reduction would never converge
+        self.chunk_tokens = max(chunk_tokens, 2 * map_max_length + 1)
+        self.batch_size = max(1, batch_size)
+        self.max_length, self.min_length = max_length, min_length
+        self.map_max_length, self.map_min_length = map_max_length, map_min_length
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        ids = self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+        return [len(x) for x in ids]
+
+    def split(self, text: str) -> List[str]:
+        """Greedily pack whole sentences into token-bounded chunks."""
+        sentences = [s for s in _SENTENCE_END.split(text.strip()) if s]
+        chunks, current, used = [], [], 0
+        for sentence, n in zip(sentences, self.count_tokens(sentences)):
+            if n > self.chunk_tokens:
+                # One run-on "sentence" (unpunctuated ASR output): cut it by token windows
+                ids = self.tokenizer(sentence, add_special_tokens=False)["input_ids"]
+                windows = [ids[i:i + self.chunk_tokens] for i in range(0, len(ids), self.chunk_tokens)]
+                pieces = [(self.tokenizer.decode(w), len(w)) for w in windows]
+            else:
+                pieces = [(sentence, n)]
+            for piece, m in pieces:
+                if current and used + m > self.chunk_tokens:
+                    chunks.append(" ".join(current))
+                    current, used = [], 0
+                current.append(piece)
+                used += m
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+
+    def _key(self, chunk: str, max_length: int, min_length: int) -> str:
+        return result_cache.cache_key("summary-chunk", _digest(chunk), model=self.model_name,
+                                      max_length=max_length, min_length=min_length)
+
+    def summarize_chunks(self, chunks: List[str], max_length: int, min_length: int) -> List[str]:
+        # Memoized per chunk; only the misses go to the model, batch_size at a time
+        keys = [self._key(c, max_length, min_length) for c in chunks]
+        out = [result_cache.read_text(k) for k in keys]
+        todo = [i for i, s in enumerate(out) if s is None]
+        if todo:
+            results = self.pipe([chunks[i] for i in todo], batch_size=self.batch_size, truncation=True,
+                                max_length=max_length, min_length=min_length, do_sample=False)
+            for i, r in zip(todo, results):
+                r = r[0] if isinstance(r, list) else r
+                out[i] = r["summary_text"].strip()
+                result_cache.store_text(keys[i], out[i])
+        return out
+
+    def summarize(self, text: str) -> str:
+        key = result_cache.cache_key("summary", _digest(text), model=self.model_name, mode="map-reduce",
+                                     chunk_tokens=self.chunk_tokens, max_length=self.max_length,
+                                     min_length=self.min_length, map_length=(self.map_max_length, self.map_min_length))
+        cached = result_cache.read_text(key)
+        if cached is not None:
+            return cached
+
+        chunks = self.split(text)
+        level = 0
+        while len(chunks) > 1:
+            print(f"Summarizing level {level}: {len(chunks)} chunks")
+            summaries = self.summarize_chunks(chunks, self.map_max_length, self.map_min_length)
+            chunks = self.split(" ".join(summaries))
+            level += 1
+        summary = self.summarize_chunks(chunks, self.max_length, self.min_length)[0] if chunks else ""
+        result_cache.store_text(key, summary)
+        return summary
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+UPLOADS_DIR = BASE_DIR / "uploads"
+ARTIFACTS_DIR = BASE_DIR / "artifacts"
+CACHE_DIR = ARTIFACTS_DIR / "cache"
+PINS_DIR = ARTIFACTS_DIR / ".pins"
+PARTIAL_DIR = UPLOADS_DIR / ".partial"  # resumable uploads in progress; expired by chunked_upload
+
+# Disk budget shared by uploads/ and artifacts/ (cache entries included); LRU beyond it
+CACHE_BUDGET_MB = float(os.environ.get("RESULT_CACHE_BUDGET_MB", "5120"))
+# Files touched this recently are never evicted, even when not pinned
+CACHE_MIN_AGE_S = float(os.environ.get("RESULT_CACHE_MIN_AGE_S", "600"))
+# The LRU index is rebuilt from disk this often (other processes' files show up then); between
+# scans stores and lookups keep it current, so a store costs no directory walk
+CACHE_SCAN_INTERVAL_S = float(os.environ.get("RESULT_CACHE_SCAN_INTERVAL_S", "300"))
+# Pins left behind by a process that died are ignored after this long
+CACHE_PIN_TTL_S = float(os.environ.get("RESULT_CACHE_PIN_TTL_S", "21600"))
+
+_HASH_CHUNK = 1024 * 1024
+_digests = {}
+_lock = threading.Lock()
+_index: Dict[str, Tuple[float, int]] = {}  # path -> (last used, size)
+_index_total = 0
+_scanned_at = None
+_SKIP_DIRS = {PINS_DIR.name, PARTIAL_DIR.name}
+
+
+def _sidecar(path: Path) -> Path:
+    return path.with_name(path.name + ".sha256")
+
+
+def write_digest(path, digest: str):
+    # Remember a content hash next to the file so other processes skip rehashing
+    _sidecar(Path(path)).write_text(digest, encoding="utf-8")
+
+
+def file_digest(path) -> str:
+    """SHA-256 of a file's bytes, memoized per (path, size, mtime)."""
+    path = Path(path)
+    st = path.stat()
+    memo_key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    digest = _digests.get(memo_key)
+    if digest:
+        return digest
+
+    sidecar = _sidecar(path)
+    if sidecar.exists() and sidecar.stat().st_mtime_ns >= st.st_mtime_ns:
+        digest = sidecar.read_text(encoding="utf-8").strip()
+    else:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        try:
+            write_digest(path, digest)
+        except OSError:
+            pass
+    _digests[memo_key] = digest
+    return digest
+
+
+def cache_key(kind: str, digest: str, **params) -> str:
+    # Same bytes + same model/version + same parameters -> same key
+    payload = json.dumps({"kind": kind, "digest": digest, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry(key: str, suffix: str) -> Path:
+    return CACHE_DIR / f"{key}{suffix}"
+
+
+def lookup(key: str, suffix: str) -> Optional[Path]:
+    path = _entry(key, suffix)
+    if not path.exists():
+        return None
+    os.utime(path)  # bump for LRU, visible to other processes at their next scan
+    with _lock:
+        entry = _index.get(str(path))
+        if entry is not None:
+            _index[str(path)] = (time.time(), entry[1])
+    return path
+
+
+def restore(key: str, suffix: str, dest) -> bool:
+    """Copy a cached result to ``dest``; False on a miss."""
+    path = lookup(key, suffix)
+    if path is None:
+        return False
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(path, dest)
+    return True
+
+
+def read_text(key: str, suffix: str = ".txt") -> Optional[str]:
+    path = lookup(key, suffix)
+    return path.read_text(encoding="utf-8") if path else None
+
+
+def store(key: str, suffix: str, src) -> Path:
+    """Copy a freshly produced result into the cache, then enforce the budget."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _entry(key, suffix)
+    tmp = path.with_name(path.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, path)
+    _stored(path)
+    return path
+
+
+def store_text(key: str, text: str, suffix: str = ".txt") -> Path:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _entry(key, suffix)
+    tmp = path.with_name(path.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+    _stored(path)
+    return path
+
+
+@contextmanager
+def pinned(path):
+    """Keep ``path`` and the files derived from it (same stem) from being evicted while the
+    block runs; the pin is a file under artifacts/.pins, so every process honours it."""
+    PINS_DIR.mkdir(parents=True, exist_ok=True)
+    pin = PINS_DIR / f"{os.getpid()}-{uuid.uuid4().hex}"
+    pin.write_text(Path(path).stem, encoding="utf-8")
+    try:
+        yield
+    finally:
+        try:
+            pin.unlink()
+        except OSError:
+            pass
+
+
+def _pinned_stems() -> Set[str]:
+    stems = set()
+    if not PINS_DIR.exists():
+        return stems
+    now = time.time()
+    for pin in PINS_DIR.iterdir():
+        try:
+            if now - pin.stat().st_mtime > CACHE_PIN_TTL_S:
+                pin.unlink()
+            else:
+                stems.add(pin.read_text(encoding="utf-8").strip())
+        except OSError:
+            continue
+    return stems
+
+
+def _is_pinned(path: str, stems: Set[str]) -> bool:
+    name = os.path.basename(path)
+    return any(stem and name.startswith(stem) for stem in stems)
+
+
+def _scan():
+    # Rebuild the index from disk; caller holds _lock
+    global _index, _index_total, _scanned_at
+    index = {}
+    for root in (UPLOADS_DIR, ARTIFACTS_DIR):
+        if not root.exists():
+            continue
+        for dirpath, dirnames, names in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS]
+            for name in names:
+                if name == ".placeholder":
+                    continue
+                p = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                index[p] = (max(st.st_mtime, st.st_atime), st.st_size)
+    _index = index
+    _index_total = sum(size for _, size in index.values())
+    _scanned_at = time.monotonic()
+
+
+def _stored(path: Path):
+    # Account for a new cache entry and trim only when the index says the budget is exceeded
+    global _index_total
+    try:
+        size = path.stat().st_size
+    except OSError:
+        return
+    with _lock:
+        if _scanned_at is None or time.monotonic() - _scanned_at > CACHE_SCAN_INTERVAL_S:
+            _scan()
+        else:
+            old = _index.get(str(path))
+            _index_total += size - (old[1] if old else 0)
+            _index[str(path)] = (time.time(), size)
+        if _index_total > CACHE_BUDGET_MB * 1024 * 1024:
+            _trim(CACHE_BUDGET_MB * 1024 * 1024)
+
+
+def evict(budget_mb: float = None) -> int:
+    """Delete least-recently-used files under uploads/ and artifacts/ until within budget.
+
+    Rescans the disk first. Files touched within ``CACHE_MIN_AGE_S`` and
+    files of pinned uploads are kept.
+    """
+    budget = (CACHE_BUDGET_MB if budget_mb is None else budget_mb) * 1024 * 1024
+    with _lock:
+        _scan()
+        return _trim(budget)
+
+
+def _trim(budget: float) -> int:
+    # Caller holds _lock; only the files actually removed are stat()ed again
+    global _index_total
+    if _index_total <= budget:
+        return 0
+    stems = _pinned_stems()
+    removed = 0
+    now = time.time()
+    for p, (used, size) in sorted(_index.items(), key=lambda item: item[1][0]):
+        if _index_total <= budget:
+            break
+        if now - used < CACHE_MIN_AGE_S:
+            break
+        if _is_pinned(p, stems):
+            continue
+        try:
+            st = os.stat(p)
+            if now - st.st_mtime < CACHE_MIN_AGE_S:  # used by another process since the scan
+                _index[p] = (st.st_mtime, st.st_size)
+                continue
+            os.remove(p)
+            removed += 1
+        except OSError:
+            pass  # already gone
+        del _index[p]
+        _index_total -= size
+    if removed:
+        print(f"[Cache] Evicted {removed} files, {_index_total / 1024 / 1024:.0f} MB in use")
+    return removed
@@ -5,11 +5,23 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))  # 👈 ADD THIS
 
-from model.intent_matcher import IntentMatcher
 from grpc_services import video_analysis_pb2, video_analysis_pb2_grpc
+from grpc_services.channels import GRPC_MAX_CONCURRENT_RPCS, server_options
+from grpc_services.registry import agent_port
+from grpc_services.readiness import Readiness
 
 
-intent_matcher = IntentMatcher()
+# sentence-transformers and the embedding model are loaded by load_matcher() once the port is bound
+intent_matcher = None
+
+
+def load_matcher():
+    global intent_matcher
+    from model.intent_matcher import IntentMatcher
+    intent_matcher = IntentMatcher()
+
+
+readiness = Readiness("MCP Server", load_matcher)
 
 
 class MCPServicer(video_analysis_pb2_grpc.VideoAnalysisServicer):
@@ -52,7 +64,8 @@ class MCPServicer(video_analysis_pb2_grpc.VideoAnalysisServicer):
                 message="Generating both PDF and PowerPoint reports..."
             )
 
-        # Run matcher
+        # Run matcher (the keyword rules above answer even while it is still loading)
+        readiness.require(context)
         intents = intent_matcher.predict_multiple(query)
         print(f"[MCP] Detected intents: {intents}")
         top_intent, confidence = intents[0] if intents else ("clarify", 0.0)
@@ -95,11 +108,15 @@ class MCPServicer(video_analysis_pb2_grpc.VideoAnalysisServicer):
 
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2), options=server_options(),
+                         maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS["mcp"])
     video_analysis_pb2_grpc.add_VideoAnalysisServicer_to_server(MCPServicer(), server)
-    server.add_insecure_port('[::]:50054')
-    print("MCP Server running on port 50054 (Semantic Intent Matcher)")
+    readiness.attach(server)
+    port = agent_port("mcp")
+    server.add_insecure_port(f'[::]:{port}')
+    print(f"MCP Server running on port {port} (Semantic Intent Matcher)")
     server.start()
+    readiness.start()
     server.wait_for_termination()
 
 
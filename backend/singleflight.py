@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one execution.
+
+    The first caller (the leader) runs the work; anyone asking for the same
+    key meanwhile blocks on the leader's result or exception instead of
+    starting a duplicate job. Nothing is remembered once the call finishes.
+    A leader that gives up (``abandon``) hands the work to the next waiter.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def claim(self, key: Hashable) -> Tuple[Future, bool]:
+        # (future, True) if the caller must do the work and release() it afterwards
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def release(self, key: Hashable, future: Future, result: Any = None,
+                error: Optional[BaseException] = None):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def abandon(self, key: Hashable, future: Future):
+        # Leader stopped without a result (e.g. its client went away); waiters retry
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        future.cancel()
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Return ``(fn(), shared)``; ``shared`` is True when another caller's run was reused."""
+        while True:
+            future, leader = self.claim(key)
+            if leader:
+                break
+            try:
+                return future.result(timeout), True
+            except CancelledError:
+                continue
+        try:
+            result = fn()
+        except BaseException as e:
+            self.release(key, future, error=e)
+            raise
+        self.release(key, future, result)
+        return result, False
+
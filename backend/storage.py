@@ -1,6 +1,10 @@
+import atexit
 import os
+import queue
+import threading
+import time
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, Text
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 # Ensure local persistent folder
@@ -8,6 +12,25 @@ os.makedirs("data", exist_ok=True)
 
 DB_PATH = "data/chat_history.db"
 engine = create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
+# Messages are written behind the request: flushed in one transaction once this many are
+# queued, or this long after the oldest unwritten one arrived
+HISTORY_BATCH_SIZE = int(os.environ.get("HISTORY_BATCH_SIZE", "64"))
+HISTORY_FLUSH_S = float(os.environ.get("HISTORY_FLUSH_S", "0.5"))
+
+
+@event.listens_for(engine, "connect")
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL lets readers run during a write and syncs only at checkpoints (NORMAL); a crash can
+    # lose the last transactions but never corrupts the file
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-8000")  # KiB
+    cursor.close()
+
+
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
 
@@ -25,23 +48,95 @@ def init_db():
     Base.metadata.create_all(bind=engine)
 
 
+class HistoryWriter:
+    """Background thread that writes queued chat messages in batched transactions.
+
+    ``put`` only enqueues, so a request never waits on the disk. ``flush``
+    blocks until everything queued before it is written; ``close`` flushes
+    and stops the thread (also run at interpreter exit).
+    """
+
+    def __init__(self, batch_size: int = HISTORY_BATCH_SIZE, flush_s: float = HISTORY_FLUSH_S):
+        self.batch_size = max(1, batch_size)
+        self.flush_s = flush_s
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="chat history writer", daemon=True)
+                self._thread.start()
+
+    def put(self, role: str, text: str):
+        self._start()
+        # Timestamped here, so history keeps request order whenever the batch lands
+        self._queue.put(ChatMessage(role=role, text=text, timestamp=datetime.utcnow()))  # store UTC
+
+    def flush(self, timeout: float = None):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _loop(self):
+        while True:
+            batch, markers, stop = [], [], False
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_s
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stop or markers or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for done in markers:
+                done.set()
+            if stop:
+                return
+
+    @staticmethod
+    def _write(batch):
+        if not batch:
+            return
+        db = SessionLocal()
+        try:
+            db.add_all(batch)
+            db.commit()
+        except Exception as e:
+            print(f"[DB] Error saving {len(batch)} messages: {e}")
+        finally:
+            db.close()
+
+
+history_writer = HistoryWriter()
+atexit.register(history_writer.close)
+
+
 def save_message(role: str, text: str):
-    # Save all message (user/assistant/system)
-    db = SessionLocal()
-    try:
-        msg = ChatMessage(role=role, text=text, timestamp=datetime.utcnow())  # store UTC
-        db.add(msg)
-        db.commit()
-        db.refresh(msg)
-        return msg.id
-    except Exception as e:
-        print(f"[DB] Error saving message: {e}")
-    finally:
-        db.close()
+    # Save all message (user/assistant/system); written by history_writer shortly after
+    history_writer.put(role, text)
 
 
 def get_recent(n: int = 100):
-    # Get last N messages in ascending order
+    # Get last N messages in ascending order, including any still queued
+    history_writer.flush()
     db = SessionLocal()
     try:
         rows = db.query(ChatMessage).order_by(ChatMessage.timestamp.desc()).limit(n).all()
@@ -61,6 +156,7 @@ def get_recent(n: int = 100):
 
 
 def clear_all_history():
+    history_writer.flush()
     db = SessionLocal()
     try:
         count = db.query(ChatMessage).delete()
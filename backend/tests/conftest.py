@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the backend modules the way the agents do, from the backend folder
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,58 @@
+import hashlib
+
+import pytest
+
+import chunked_upload
+import result_cache
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    monkeypatch.setattr(chunked_upload, "UPLOADS_DIR", uploads)
+    monkeypatch.setattr(chunked_upload, "PARTIAL_DIR", uploads / ".partial")
+    monkeypatch.setattr(chunked_upload, "_sessions", {})
+    monkeypatch.setattr(chunked_upload, "_digest_index", None)
+    return uploads
+
+
+def test_lost_partial_file_is_refused_then_resumed_from_disk(uploads):
+    data = bytes(range(256)) * 1000
+    upload_id = chunked_upload.init_upload("talk.mp4", len(data))["upload_id"]
+    chunked_upload.write_chunk(upload_id, 0, data[:100000])
+    (uploads / ".partial" / f"{upload_id}.part").unlink()  # e.g. removed by a cleanup job
+
+    with pytest.raises(chunked_upload.UploadError) as refused:
+        chunked_upload.write_chunk(upload_id, 100000, data[100000:200000])
+    assert refused.value.status_code == 409 and refused.value.extra["offset"] == 0
+
+    assert chunked_upload.get_session(upload_id).offset == 0
+    chunked_upload.write_chunk(upload_id, 0, data)
+    result = chunked_upload.finalize_upload(upload_id)
+    assert (uploads / result["file_name"]).read_bytes() == data
+    assert result["sha256"] == hashlib.sha256(data).hexdigest()
+
+
+def test_truncated_partial_file_blocks_finalize(uploads):
+    upload_id = chunked_upload.init_upload("talk.mp4")["upload_id"]
+    chunked_upload.write_chunk(upload_id, 0, b"x" * 1000)
+    with open(uploads / ".partial" / f"{upload_id}.part", "r+b") as f:
+        f.truncate(500)
+    with pytest.raises(chunked_upload.UploadError) as refused:
+        chunked_upload.finalize_upload(upload_id)
+    assert refused.value.status_code == 409 and refused.value.extra["offset"] == 500
+
+
+def test_eviction_skips_partial_uploads(uploads, monkeypatch):
+    monkeypatch.setattr(result_cache, "UPLOADS_DIR", uploads)
+    monkeypatch.setattr(result_cache, "ARTIFACTS_DIR", uploads.parent / "artifacts")
+    monkeypatch.setattr(result_cache, "PINS_DIR", uploads.parent / "artifacts" / ".pins")
+    monkeypatch.setattr(result_cache, "CACHE_MIN_AGE_S", 0)
+    upload_id = chunked_upload.init_upload("talk.mp4")["upload_id"]
+    chunked_upload.write_chunk(upload_id, 0, b"x" * 1000)
+    stored = uploads / "done.mp4"
+    stored.write_bytes(b"y" * 1000)
+    result_cache.evict(budget_mb=0)
+    assert not stored.exists()
+    assert chunked_upload.write_chunk(upload_id, 1000, b"x")["offset"] == 1001
@@ -0,0 +1,118 @@
+import asyncio
+import importlib
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import grpc
+import pytest
+
+from admission import AgentLimiter
+from grpc_services import video_analysis_pb2
+from grpc_services.embedded import EmbeddedRpcError
+from jobs import JobQueue
+
+
+@pytest.fixture
+def gateway(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # main creates uploads/ and data/ in the working directory
+    main = importlib.import_module("main")
+    (tmp_path / "talk.mp4").write_bytes(b"")
+    monkeypatch.setattr(main, "UPLOADS_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "save_message", lambda role, text: None)
+    monkeypatch.setattr(main, "limiters", {name: AgentLimiter(name, 2, 8) for name in ("transcription", "vision", "mcp")})
+    return main
+
+
+class FakeAgents:
+    # Just enough of AioChannelManager for the gateway's job runners
+    registry = SimpleNamespace(count=lambda name: 1)
+
+    def __init__(self, stub):
+        self.stub = stub
+
+    @contextmanager
+    def call(self, name):
+        yield self.stub
+
+    def timeout(self, name):
+        return 5
+
+
+class NoAsrStub:
+    # What a transcription agent without faster-whisper answers
+    async def _refuse(self):
+        raise EmbeddedRpcError(grpc.StatusCode.FAILED_PRECONDITION, "No local ASR installed.")
+        yield
+
+    def StreamTranscribeVideo(self, request, timeout=None):
+        return self._refuse()
+
+    async def TranscribeVideo(self, request, timeout=None):
+        return video_analysis_pb2.TextResponse(transcript="(No local ASR installed) Audio saved")
+
+
+def test_transcribe_without_asr_returns_the_fallback_transcript(gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "aio_agents", FakeAgents(NoAsrStub()))
+
+    async def scenario():
+        monkeypatch.setattr(gateway, "job_queue", JobQueue())
+        job, _ = gateway._submit("transcribe", "talk.mp4")
+        result = await gateway._result(job)
+        return result, [event for event, _ in job.events]
+
+    result, events = asyncio.run(scenario())
+    assert result == {"transcript": "(No local ASR installed) Audio saved"}
+    assert "segment" in events
+
+
+def failing_pin(path):
+    raise OSError("disk full")
+
+
+def test_failed_pin_returns_the_job_reservation(gateway, monkeypatch):
+    monkeypatch.setattr(gateway.result_cache, "pinned", failing_pin)
+
+    async def scenario():
+        monkeypatch.setattr(gateway, "job_queue", JobQueue())
+        job, _ = gateway._submit("transcribe", "talk.mp4")
+        await job.wait()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == "failed"
+    assert gateway.limiters["transcription"].status()["waiting"] == 0
+    assert gateway.limiters["transcription"].status()["active"] == 0
+
+
+def test_failed_pin_returns_both_analyze_reservations(gateway, monkeypatch):
+    monkeypatch.setattr(gateway.result_cache, "pinned", failing_pin)
+    with pytest.raises(gateway.HTTPException):
+        asyncio.run(gateway.analyze_shared("talk.mp4"))
+    assert gateway.limiters["transcription"].status()["waiting"] == 0
+    assert gateway.limiters["vision"].status()["waiting"] == 0
+
+
+def test_cancelled_analyze_returns_the_vision_reservation(gateway):
+    async def scenario():
+        asr = gateway.limiters["transcription"] = AgentLimiter("transcription", 1, 8)
+        asr.reserve()
+        async with asr.slot():  # the transcription agent is busy, so /analyze waits
+            task = asyncio.create_task(gateway.analyze_shared("talk.mp4"))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert gateway.limiters["transcription"].status()["waiting"] == 0
+    assert gateway.limiters["vision"].status()["waiting"] == 0
+
+
+def test_failed_history_write_returns_the_clarify_reservation(gateway, monkeypatch):
+    def failing_save(role, text):
+        raise RuntimeError("history unavailable")
+
+    monkeypatch.setattr(gateway, "save_message", failing_save)
+    monkeypatch.setattr("storage.save_message", failing_save)  # /clarify imports it locally
+    with pytest.raises(RuntimeError):
+        asyncio.run(gateway.clarify_query("make a pdf"))
+    assert gateway.limiters["mcp"].status()["waiting"] == 0
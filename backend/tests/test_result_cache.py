@@ -0,0 +1,54 @@
+import os
+import time
+
+import pytest
+
+import result_cache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "UPLOADS_DIR", tmp_path / "uploads")
+    monkeypatch.setattr(result_cache, "ARTIFACTS_DIR", tmp_path / "artifacts")
+    monkeypatch.setattr(result_cache, "CACHE_DIR", tmp_path / "artifacts" / "cache")
+    monkeypatch.setattr(result_cache, "PINS_DIR", tmp_path / "artifacts" / ".pins")
+    monkeypatch.setattr(result_cache, "_scanned_at", None)
+    (tmp_path / "uploads").mkdir()
+    return tmp_path
+
+
+def old_file(path, size, age=3600):
+    path.write_bytes(b"x" * size)
+    then = time.time() - age
+    os.utime(path, (then, then))
+    return path
+
+
+def test_pinned_upload_and_derived_files_survive(cache):
+    video = old_file(cache / "uploads" / "talk.mp4", 1000)
+    transcript = old_file(cache / "uploads" / "talk_transcript.txt", 1000)
+    other = old_file(cache / "uploads" / "other.mp4", 1000)
+    with result_cache.pinned(video):
+        result_cache.evict(budget_mb=0)
+    assert video.exists() and transcript.exists()
+    assert not other.exists()
+    result_cache.evict(budget_mb=0)
+    assert not video.exists()
+
+
+def test_store_does_not_walk_the_tree_each_time(cache, monkeypatch):
+    walks = []
+    real_walk = os.walk
+    monkeypatch.setattr(result_cache.os, "walk", lambda root: walks.append(root) or real_walk(root))
+    for i in range(20):
+        result_cache.store_text(f"key{i}", "summary")
+    assert len(walks) == 2  # one scan of uploads/ and artifacts/
+
+
+def test_store_trims_least_recently_used_over_budget(cache, monkeypatch):
+    monkeypatch.setattr(result_cache, "CACHE_BUDGET_MB", 1500 / 1024 / 1024)
+    oldest = old_file(cache / "uploads" / "a.mp4", 1000, age=7200)
+    newer = old_file(cache / "uploads" / "b.mp4", 400, age=3600)
+    result_cache.store_text("fresh", "y" * 200)
+    assert not oldest.exists()
+    assert newer.exists()
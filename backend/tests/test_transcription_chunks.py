@@ -0,0 +1,27 @@
+from agents.transcription_agent import plan_chunks
+
+
+def speech_between(cuts):
+    # VAD segments whose silences are centred on ``cuts``
+    bounds = [0] + cuts + [10 ** 9]
+    return [{"start": a + 1, "end": b - 1} for a, b in zip(bounds, bounds[1:])]
+
+
+def test_chunks_tile_the_audio():
+    chunks = plan_chunks(speech_between([40, 90, 130]), 200, 100)
+    assert chunks[0][0] == 0 and chunks[-1][1] == 200
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+
+
+def test_no_speech_means_no_chunks():
+    assert plan_chunks([], 1000, 100) == []
+
+
+def test_tail_is_split_at_the_last_cut():
+    chunks = plan_chunks(speech_between([55, 160, 205, 410, 665]), 1000, 100)
+    assert chunks == [(0, 55), (55, 160), (160, 205), (205, 410), (410, 665), (665, 1000)]
+
+
+def test_short_tail_stays_whole():
+    assert plan_chunks(speech_between([60]), 95, 100) == [(0, 95)]
+    assert plan_chunks(speech_between([30, 120]), 180, 100) == [(0, 30), (30, 120), (120, 180)]
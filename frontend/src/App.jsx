@@ -71,8 +71,7 @@ export default function App() {
         await generate("pptx");
       } else if (lower.includes("both")) {
         addMessage("assistant", "Generating both PDF and PowerPoint reports...");
-        await generate("pdf");
-        await generate("pptx");
+        await generate("both");
       }
       setInput("");
       return;
@@ -98,8 +97,7 @@ export default function App() {
         await generate("pptx");
       } else if (data.decision === "generate_both") {
         addMessage("assistant", data.message);
-        await generate("pdf");
-        await generate("pptx");
+        await generate("both");
       } else if (data.decision === "ask_generate_format") {
         // Ask once for format
         addMessage("assistant", data.message);
@@ -135,7 +133,9 @@ export default function App() {
     addMessage("user", `Generating ${type.toUpperCase()} report...`);
     const res = await fetch(`${API}/generate?file_name=${fileName}&report_type=${type}`, { method: "POST" });
     const data = await res.json();
-    if (data.report_path)
+    if (data.report_paths)
+      data.report_paths.forEach((p) => addMessage("assistant", `Report ready: ${p}`));
+    else if (data.report_path)
       addMessage("assistant", `Report ready: ${data.report_path}`);
     else addMessage("assistant", "Report generation failed.");
   };